@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import re
+import sys
+import json
+import platform
+import tracemalloc
+import numpy as np
+
+from time import perf_counter, strftime
+from statistics import mean, median, stdev
+from tempfile import mkdtemp
+from shutil import rmtree
+from os.path import getsize, join
+from argparse import ArgumentParser
+
+import nine as N
+
+
+def _names(n:int) -> list:
+    return [f"SYN_{'bcdefghijklmnopqrstuvwxyz'[k]}" for k in range(n)]
+
+
+def write_sim(file_name:str, n:int=3, steps:int=1000, dt:float=365.2425,
+              seed:int=0, size:int=None) -> str:
+    r"""
+    Writes a synthetic result file in the format of nine.exe,
+    type is detected based on file extension (bel or bco).
+    With size [bytes] the number of steps is chosen to get (about) that
+    file size instead.
+    """
+    rng = np.random.default_rng(seed)
+    labels = N.LABELS[file_name.split(".")[-1]]
+    scale = np.array([1e-3, 5, 0.9, 90, 360, 360, 360])
+    names = _names(n)
+    row = "  {:.14E}" * 8 + "  {}\n"
+    head = "  " + "".join(f"{label:<24}" for label in labels).rstrip() + "\n"
+    if size is not None:
+        block = sum(len(row.format(*[0.0]*8, name)) for name in names)
+        steps = max((size - len(head)) // block, 1)
+    with open(file_name, "w") as f:
+        f.write(head)
+        for j in range(steps):
+            cols = rng.random((n, 7)) * scale
+            f.write("".join(row.format(j*dt, *cols[k], names[k])
+                            for k in range(n)))
+    return file_name
+
+
+def legacy_load(file_name:str) -> dict:
+    r"""
+    The regex + genfromtxt double read used before the single pass parser,
+    kept as reference for benchmarks.
+    """
+    def get_line(f):
+        line = re.sub(r"(\s{2,}|\n)", r",", f.readline())
+        line = re.sub(r"\s\[(.*?)\]", r"", line)
+        line = re.sub(r"\s", r"_", line)
+        return re.split(r",", line[1:-1])
+    with open(file_name, "r") as f:
+        get_line(f)
+        names = list()
+        name = get_line(f)[-1]
+        n_lines = 1
+        while name not in names:
+            names.append(name)
+            name = get_line(f)[-1]
+            n_lines += 1
+        for remaining in f.readlines():
+            n_lines += 1
+    cols = [0, 2, 3, 4, 5] if file_name.endswith(".bel") else [0, 2, 3, 4]
+    data = np.genfromtxt(file_name, skip_header=1, usecols=cols,
+                         dtype=np.float64, ndmin=2)
+    n = len(names)
+    steps = n_lines // n
+    data = data[:steps*n].reshape(steps, n, len(cols)).transpose(2, 1, 0)
+    return {"n": n, "steps": steps, "names": names, "data": data}
+
+
+def bench_parse(file_name:str, repeat:int=3) -> dict:
+    r"""
+    Compares rows/second of the legacy parser and nine.load_sim (parsing,
+    without the cache).
+    """
+    n_rows = N.info_sim(file_name, output=False)[1]
+    R = dict()
+    for label, load in [("legacy", legacy_load),
+                        ("load_sim", lambda p: N.load_sim(p, output=False,
+                                                          cache=False))]:
+        best = float("inf")
+        for _ in range(repeat):
+            t_0 = perf_counter()
+            load(file_name)
+            best = min(best, perf_counter() - t_0)
+        R[label] = n_rows / best
+        print(f"{label:>10}: {R[label]:12.0f} rows/s ({best:.3f} s)")
+    print(f"{'speedup':>10}: {R['load_sim'] / R['legacy']:12.2f}")
+    return R
+
+
+def synthetic_conf(n:int=3, steps:int=1000,
+                   dt:float=365.2425) -> N.NineConf:
+    r"""
+    Config matching the bodies of write_sim (central body + n), e.g. for
+    NineConf.table.
+    """
+    bodies = [[0, 0, 0, 0, 0, 0, 1, None, "SYN_a"]]
+    bodies += [[1 + k, 0.1, 10, 0, 0, 0, 1e-3, None, name]
+               for k, name in enumerate(_names(n))]
+    return N.NineConf(bodies, name="SYN", timing=[0, steps*dt, dt])
+
+
+def measure(fn, repeat:int=5, warmup:int=1) -> dict:
+    r"""
+    Runs fn warmup + repeat times, returns min/median/mean/stdev of the
+    wall time [s] and the peak of traced memory [bytes] (tracemalloc, in a
+    separate run so the tracing doesn't distort the times).
+    Memory mapped data (cache, binary files) isn't traced.
+    """
+    for _ in range(warmup):
+        fn()
+    times = list()
+    for _ in range(repeat):
+        t_0 = perf_counter()
+        fn()
+        times.append(perf_counter() - t_0)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"repeat": repeat, "min": min(times), "median": median(times),
+            "mean": mean(times), "stdev": stdev(times) if repeat > 1 else 0,
+            "peak_bytes": peak}
+
+
+def bench_pipeline(n:int=8, steps:int=20000, size:int=None, repeat:int=5,
+                   stages:list=None, output:bool=True) -> dict:
+    r"""
+    Times the stages of the analysis pipeline on synthetic files (see
+    write_sim) in a temporary directory:
+        info_sim, load_sim (parse, cached and float32), load_sim_bco,
+        plot and table
+    A failing stage (e.g. plot without LaTeX) is recorded with its error.
+    Returns the results as dict (JSON serializable).
+    """
+    tmp = mkdtemp(prefix="nine-bench-")
+    root_path = N.ROOT_PATH
+    N.ROOT_PATH = tmp
+    try:
+        bel = write_sim(join(tmp, "bench.bel"), n, steps, size=size)
+        bco = write_sim(join(tmp, "bench.bco"), n, steps, size=size)
+        n_rows = N.info_sim(bel, output=False)[1]
+        D = N.load_sim(bel, output=False)
+        C = synthetic_conf(n, D.steps)
+        B = {
+            "info_sim": lambda: N.info_sim(bel, output=False),
+            "load_sim": lambda: N.load_sim(bel, output=False, cache=False),
+            "load_sim_cached": lambda: N.load_sim(bel, output=False),
+            "load_sim_float32": lambda: N.load_sim(bel, output=False,
+                                                   cache=False,
+                                                   dtype=np.float32),
+            "load_sim_bco": lambda: N.load_sim(bco, output=False,
+                                               cache=False),
+            "plot": lambda: N.plot(D, save_name="bench.png", dpi=100,
+                                   output=False),
+            "table": lambda: C.table(D),
+        }
+        R = {"meta": {"time": strftime("%Y-%m-%dT%H:%M:%S"),
+                      "python": platform.python_version(),
+                      "numpy": np.__version__,
+                      "machine": platform.machine(),
+                      "bodies": n, "steps": D.steps, "rows": n_rows,
+                      "bytes": getsize(bel)},
+             "stages": dict()}
+        for stage in stages or list(B):
+            try:
+                S = measure(B[stage], repeat)
+                if stage.startswith(("info_sim", "load_sim")):
+                    S["rows_per_s"] = n_rows / S["median"]
+            except Exception as err:
+                S = {"error": f"{type(err).__name__}: {err}"}
+            R["stages"][stage] = S
+            if output:
+                if "error" in S:
+                    print(f"{stage:>17}: {S['error']}", file=sys.stderr)
+                else:
+                    print(f"{stage:>17}: {S['median']:9.4f} s "
+                          f"(+-{S['stdev']:.4f}) "
+                          f"{S['peak_bytes'] / 2**20:9.1f} MiB",
+                          file=sys.stderr)
+        return R
+    finally:
+        N.ROOT_PATH = root_path
+        rmtree(tmp, ignore_errors=True)
+
+
+def compare(baseline:dict, R:dict, tolerance:float=0.2) -> list:
+    r"""
+    Stages of R whose median time or peak memory exceed the baseline by
+    more than tolerance (relative).
+    Returns (stage, quantity, baseline, now) of every regression.
+    """
+    regressions = list()
+    for stage, S in R["stages"].items():
+        S_0 = baseline["stages"].get(stage, {})
+        for q in ["median", "peak_bytes"]:
+            if q in S and q in S_0 and S[q] > S_0[q] * (1 + tolerance):
+                regressions.append((stage, q, S_0[q], S[q]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="benchmark the nine.py pipeline")
+    parser.add_argument("--bodies", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--size", type=int, help="file size [bytes]")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stages", nargs="+")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--parse", action="store_true",
+                        help="only compare with the legacy parser")
+    args = parser.parse_args()
+    if args.parse:
+        bench_parse(write_sim("/tmp/bench.bel", n=args.bodies,
+                              steps=args.steps, size=args.size),
+                    repeat=args.repeat)
+        sys.exit()
+    R = bench_pipeline(args.bodies, args.steps, args.size, args.repeat,
+                       args.stages)
+    if args.json is None:
+        print(json.dumps(R, indent=2))
+    else:
+        with open(args.json, "w") as f:
+            json.dump(R, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            regressions = compare(json.load(f), R, args.tolerance)
+        for stage, q, old, new in regressions:
+            print(f"regression {stage} {q}: {old:g} -> {new:g}",
+                  file=sys.stderr)
+        sys.exit(1 if regressions else 0)
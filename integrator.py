@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+import sys
+import numpy as np
+
+from time import perf_counter
+
+import nine as N
+
+
+K = 0.01720209895  # Gaussian gravitational constant
+G = K ** 2  # [au^3 / (Msol dy^2)]
+ROW = "  {:.14E}" * 8 + "  {}\n"
+
+
+def kepler_to_cartesian(a, e, i, o, O, M, mu) -> (np.ndarray, np.ndarray):
+    r"""
+    Keplerian elements (angles in degrees) to position [au] and velocity
+    [au/dy] relative to the central body, mu = G (m_0 + m).
+    All arguments broadcast, returns arrays of shape (..., 3).
+    """
+    a, e, mu = np.asarray(a, float), np.asarray(e, float), np.asarray(mu)
+    i, o, O, M = (np.deg2rad(x) for x in (i, o, O, M))
+    # eccentric anomaly, Newton iteration of Kepler's equation
+    E = M + e * np.sin(M)
+    for _ in range(32):
+        E = E - (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+    cos_E, sin_E = np.cos(E), np.sin(E)
+    b = np.sqrt(1 - e ** 2)
+    n = np.sqrt(mu / np.where(a > 0, a, 1) ** 3)
+    x, y = a * (cos_E - e), a * b * sin_E
+    vx = -a * n * sin_E / (1 - e * cos_E)
+    vy = a * n * b * cos_E / (1 - e * cos_E)
+    P = np.stack([np.cos(o) * np.cos(O) - np.sin(o) * np.cos(i) * np.sin(O),
+                  np.cos(o) * np.sin(O) + np.sin(o) * np.cos(i) * np.cos(O),
+                  np.sin(o) * np.sin(i)], axis=-1)
+    Q = np.stack([-np.sin(o) * np.cos(O) - np.cos(o) * np.cos(i) * np.sin(O),
+                  -np.sin(o) * np.sin(O) + np.cos(o) * np.cos(i) * np.cos(O),
+                  np.cos(o) * np.sin(i)], axis=-1)
+    return x[..., None] * P + y[..., None] * Q, \
+        vx[..., None] * P + vy[..., None] * Q
+
+
+def cartesian_to_kepler(r:np.ndarray, v:np.ndarray, mu) -> np.ndarray:
+    r"""
+    Position and velocity relative to the central body (..., 3) to
+    Keplerian elements (..., 6): a, e, i, omega, Omega, M (degrees).
+    Unbound orbits give a < 0, e >= 1 and M = NaN.
+    """
+    mu = np.asarray(mu)
+    h = np.cross(r, v)
+    r_n = np.linalg.norm(r, axis=-1)
+    h_n = np.linalg.norm(h, axis=-1)
+    a = 1 / (2 / r_n - (v * v).sum(axis=-1) / mu)
+    e_vec = np.cross(v, h) / mu[..., None] - r / r_n[..., None]
+    e = np.linalg.norm(e_vec, axis=-1)
+    i = np.arccos(np.clip(h[..., 2] / h_n, -1, 1))
+    # line of nodes, the x axis for planar orbits
+    node = np.stack([-h[..., 1], h[..., 0], np.zeros_like(h_n)], axis=-1)
+    planar = np.linalg.norm(node, axis=-1) < 1e-12 * h_n
+    node[planar] = [1, 0, 0]
+    O = np.arctan2(node[..., 1], node[..., 0])
+    h_u = h / h_n[..., None]
+
+    def angle(u, w):
+        return np.arctan2((np.cross(u, w) * h_u).sum(axis=-1),
+                          (u * w).sum(axis=-1))
+    o = angle(node, e_vec)
+    f = angle(e_vec, r)
+    with np.errstate(invalid="ignore"):
+        E = np.arctan2(np.sqrt(1 - e ** 2) * np.sin(f), e + np.cos(f))
+        M = E - e * np.sin(E)
+    angles = np.rad2deg(np.stack([i, o, O, M], axis=-1))
+    angles[..., 1:] %= 360
+    return np.concatenate([a[..., None], e[..., None], angles], axis=-1)
+
+
+def _mass(body:list) -> float:
+    return N.m_sol(body[7], body[2]) if body[6] is None else body[6]
+
+
+def initial_state(systems:list,
+                  inputformat:str="he") -> (np.ndarray, np.ndarray,
+                                            np.ndarray):
+    r"""
+    Barycentric state of systems (lists of bodies like NineConf, all with
+    the same number of bodies, the first is the central body).
+    inputformat he: heliocentric Keplerian elements, rv: barycentric
+    [rx, ry, rz, vx, vy, vz] (e.g. from nine.last_state).
+    Returns masses (S, n), positions and velocities (S, n, 3).
+    """
+    m = np.array([[_mass(body) for body in bodies] for bodies in systems])
+    X = np.array([[body[:6] for body in bodies] for bodies in systems],
+                 dtype=float)
+    if inputformat == "rv":
+        return m, X[..., :3].copy(), X[..., 3:].copy()
+    if inputformat != "he":
+        raise Exception(f"Unsupported input format '{inputformat}'.")
+    r, v = np.zeros_like(X[..., :3]), np.zeros_like(X[..., :3])
+    mu = G * (m[:, :1] + m[:, 1:])
+    r[:, 1:], v[:, 1:] = kepler_to_cartesian(*X[:, 1:].transpose(2, 0, 1),
+                                             mu)
+    # heliocentric -> barycentric
+    M = m.sum(axis=1)[:, None, None]
+    r -= (m[..., None] * r).sum(axis=1, keepdims=True) / M
+    v -= (m[..., None] * v).sum(axis=1, keepdims=True) / M
+    return m, r, v
+
+
+def accelerations(m:np.ndarray, r:np.ndarray) -> np.ndarray:
+    r"""
+    Mutual gravitational accelerations of all bodies of all systems,
+    m (S, n), r (S, n, 3) -> (S, n, 3).
+    """
+    d = r[:, None, :, :] - r[:, :, None, :]
+    r2 = (d * d).sum(axis=-1)
+    idx = np.arange(r.shape[1])
+    r2[:, idx, idx] = np.inf
+    return G * np.einsum("sij,sijk->sik", m[:, None, :] * r2 ** -1.5, d)
+
+
+def leapfrog(m:np.ndarray, r:np.ndarray, v:np.ndarray, timing:list,
+             h:float=None):
+    r"""
+    Integrates the systems with the kick-drift-kick leapfrog (symplectic,
+    2nd order, fixed stepsize), all bodies and systems at once.
+    h defaults to 1/50 of the shortest P (1 - e)^2 / sqrt(1 + e) of the
+    initial osculating orbits around the first body, i.e. the pericentre
+    timescale P (1 - e)^1.5 times sqrt((1 - e) / (1 + e)), so the relative
+    energy error (bounded, at most ~2e-3) does not grow with e.
+    h is adjusted to a whole number of steps per output interval.
+    Yields time [dy], positions and velocities at every output time of
+    timing [start, stop, step] (including the start).
+    """
+    t_0, t_1, dt = timing
+    r, v = r.copy(), v.copy()
+    if h is None:
+        mu = G * (m[:, :1] + m[:, 1:])
+        el = cartesian_to_kepler(r[:, 1:] - r[:, :1], v[:, 1:] - v[:, :1],
+                                 mu)
+        a, e = el[..., 0], el[..., 1]
+        # unbound bodies don't limit the stepsize
+        with np.errstate(invalid="ignore"):
+            P = 2 * np.pi * np.sqrt(a ** 3 / mu) * (1 - e) ** 2 \
+                / np.sqrt(1 + e)
+        h = np.nanmin(P) / 50
+    sub = max(int(np.ceil(dt / h)), 1)
+    h = dt / sub
+    acc = accelerations(m, r)
+    yield t_0, r, v
+    for j in range(1, round((t_1 - t_0) / dt) + 1):
+        for _ in range(sub):
+            v += 0.5 * h * acc
+            r += h * v
+            acc = accelerations(m, r)
+            v += 0.5 * h * acc
+        yield t_0 + j * dt, r, v
+
+
+def _head(file_extension:str) -> str:
+    labels = N.LABELS[file_extension]
+    return "  " + "".join(f"{label:<24}" for label in labels).rstrip() + "\n"
+
+
+def write_sims(confs:list, file_names:list, h:float=None,
+               progress:bool=False) -> None:
+    r"""
+    Integrates confs (same number of bodies, timing and input format) in
+    one batch and writes their output files, file_names gives per conf a
+    dict output file extension (bel, bco) -> path.
+    bel: heliocentric elements (without the central body), bco: barycentric
+    coordinates and velocities, both in the format of nine.exe.
+    """
+    systems = [c.bodies for c in confs]
+    m, r, v = initial_state(systems, confs[0].inputformat)
+    names = [[body[-1].replace(" ", "_") for body in bodies]
+             for bodies in systems]
+    files = [{ext: open(path, "w") for ext, path in F.items()}
+             for F in file_names]
+    try:
+        for F in files:
+            for ext, f in F.items():
+                if ext not in N.LABELS:
+                    raise Exception(f"Unsupported output file '{ext}'.")
+                f.write(_head(ext))
+        mu = G * (m[:, :1] + m[:, 1:])
+        t_0, t_1, _ = confs[0].timing
+        for t, r, v in leapfrog(m, r, v, confs[0].timing, h):
+            if any("bel" in F for F in files):
+                el = cartesian_to_kepler(r[:, 1:] - r[:, :1],
+                                         v[:, 1:] - v[:, :1], mu)
+            for s, F in enumerate(files):
+                if "bel" in F:
+                    F["bel"].write("".join(
+                        ROW.format(t, m[s, k+1], *el[s, k], names[s][k+1])
+                        for k in range(el.shape[1])))
+                if "bco" in F:
+                    F["bco"].write("".join(
+                        ROW.format(t, m[s, k], *r[s, k], *v[s, k],
+                                   names[s][k])
+                        for k in range(r.shape[1])))
+            if progress:
+                print(f"\r{100 * (t - t_0) / (t_1 - t_0):6.1f} %", end="",
+                      flush=True)
+        if progress:
+            print()
+    finally:
+        for F in files:
+            for f in F.values():
+                f.close()
+
+
+def run_many(confs:list, h:float=None, output:bool=True) -> list:
+    r"""
+    Local stand-in for nine.run_many: saves the inn files and integrates
+    the confs with the leapfrog of this module, confs with the same number
+    of bodies, timing and input format are integrated in one batch.
+    Outputs are placed like results of nine.exe (save_file_path).
+    Returns a status dict per conf: index, name, inn, out, files, status
+    and seconds (of its batch).
+    """
+    S = list()
+    for k, c in enumerate(confs):
+        inn, cnt = c.save()
+        files = {ext: N.save_file_path(c.name, ext, cnt=cnt)
+                 for ext in c.outputfiles.split(" ")}
+        S.append({"index": k, "name": c.name, "inn": inn,
+                  "out": list(files.values())[-1],
+                  "files": list(files.values()), "F": files})
+    groups = dict()
+    for k, c in enumerate(confs):
+        key = (len(c.bodies), tuple(c.timing), c.inputformat)
+        groups.setdefault(key, list()).append(k)
+    for key, idx in groups.items():
+        t_0 = perf_counter()
+        try:
+            write_sims([confs[k] for k in idx], [S[k]["F"] for k in idx], h)
+            status = "done"
+        except Exception as err:
+            status = f"error ({err})"
+        for k in idx:
+            S[k]["status"] = status
+            S[k]["seconds"] = perf_counter() - t_0
+            if output:
+                print(f"{S[k]['name']}: {status} ({S[k]['seconds']:.1f} s)"
+                      f" -> {S[k]['out']}")
+    for status in S:
+        del status["F"]
+    return S
+
+
+if __name__ == "__main__":
+    # drop-in for nine.exe: integrates config.inn of the working
+    # directory into out.<extension>
+    C = N.load_conf("config.inn")
+    write_sims([C], [{ext: f"out.{ext}"
+                      for ext in C.outputfiles.split(" ")}],
+               progress="-q" not in sys.argv)
@@ -0,0 +1,133 @@
+import json
+import logging
+
+from os import getpid
+from time import time, perf_counter
+from threading import Lock, get_ident
+
+
+SINKS = list()  # callables receiving every finished span record
+
+
+def add_sink(sink) -> None:
+    SINKS.append(sink)
+
+
+def remove_sink(sink) -> None:
+    if sink in SINKS:
+        SINKS.remove(sink)
+
+
+class span:
+    r"""
+    Named and timed stage (parse, demux, derived, fft, render, savefig,
+    exe, ...). Used as context manager or ended explicitly with end().
+    Fields (file, bytes read, nbytes and shape of arrays, ...) can be given
+    at the start or the end, the finished record is passed to all SINKS.
+        with span("parse", file=file_name) as s:
+            ...
+            s.end(nbytes=data.nbytes)
+    """
+
+    __slots__ = ("rec", "__t_0")
+
+    def __init__(self, name:str, /, **fields):
+        self.rec = {"span": name, **fields}
+        self.__t_0 = perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.rec["error"] = exc_type.__name__
+        self.end()
+
+    def end(self, **fields) -> dict:
+        r"""
+        Stops the span (only the first call counts).
+        Returns the record.
+        """
+        if "seconds" not in self.rec:
+            self.rec.update(fields)
+            self.rec["seconds"] = perf_counter() - self.__t_0
+            if SINKS:
+                self.rec["time"] = time()
+                self.rec["pid"] = getpid()
+                self.rec["thread"] = get_ident()
+                for sink in list(SINKS):
+                    sink(self.rec)
+        return self.rec
+
+
+class JsonlSink:
+    r"""
+    Appends every span as JSON line to file_name, one line per write so
+    several threads and processes can share the file.
+    """
+
+    def __init__(self, file_name:str):
+        self.file_name = file_name
+        self.__lock = Lock()
+
+    def __call__(self, rec:dict) -> None:
+        line = json.dumps(rec, default=str) + "\n"
+        with self.__lock:
+            with open(self.file_name, "a") as f:
+                f.write(line)
+
+
+class LogSink:
+    r"""
+    Logs every span to a logger (default: logger "nine").
+    """
+
+    def __init__(self, logger:logging.Logger=None, level:int=logging.INFO):
+        self.logger = logging.getLogger("nine") if logger is None else logger
+        self.level = level
+
+    def __call__(self, rec:dict) -> None:
+        fields = " ".join(f"{key}={val}" for key, val in rec.items()
+                          if key not in {"span", "seconds", "time", "pid",
+                                         "thread"})
+        self.logger.log(self.level, "%s %.4f s %s", rec["span"],
+                        rec["seconds"], fields)
+
+
+class Totals:
+    r"""
+    Aggregates the spans per name: count, seconds, bytes and nbytes.
+    Can also be filled from JSON lines files (see JsonlSink) afterwards.
+    """
+
+    def __init__(self):
+        self.totals = dict()
+        self.__lock = Lock()
+
+    def __call__(self, rec:dict) -> None:
+        with self.__lock:
+            T = self.totals.setdefault(rec["span"], {"count": 0,
+                                                     "seconds": 0.0,
+                                                     "bytes": 0,
+                                                     "nbytes": 0})
+            T["count"] += 1
+            T["seconds"] += rec["seconds"]
+            T["bytes"] += rec.get("bytes", 0)
+            T["nbytes"] += rec.get("nbytes", 0)
+
+    def read(self, file_name:str) -> "Totals":
+        with open(file_name, "r") as f:
+            for line in f:
+                try:
+                    self(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return self
+
+    def __str__(self) -> str:
+        lines = [f"{'span':>10} {'count':>7} {'seconds':>10} {'MiB':>9}"]
+        for name, T in sorted(self.totals.items(),
+                              key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{name:>10} {T['count']:7d} {T['seconds']:10.3f} "
+                         f"{T['bytes'] / 2**20:9.1f}")
+        return "\n".join(lines)
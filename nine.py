@@ -1,15 +1,60 @@
 import re
+import json
+import asyncio
 import numpy as np
 from matplotlib import pyplot as plt
 
-from subprocess import call
-from time import strftime, localtime
-from os.path import isdir, isfile
+from subprocess import call, CalledProcessError
+from time import strftime, localtime, perf_counter
+from os import stat, rename, replace, remove, makedirs, cpu_count, \
+    scandir, open as os_open, close, O_CREAT, O_EXCL, O_WRONLY
+from os.path import isdir, isfile, abspath, basename, dirname, join
+from shutil import rmtree, copyfile, copyfileobj, move
+from copy import copy
+from tempfile import mkdtemp
+from hashlib import sha1, sha256
 from glob import glob
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, \
+    as_completed
+from itertools import islice
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
+
+from spectral import ft_filter
+from metrics import span
 
 
 ROOT_PATH = "./"
 SAVE_PATH = "/out/"
+_SAVE_LOCK = Lock()  # guards _SAVE_CNT
+_SAVE_CNT = dict()  # (save path, name, extension) -> next free counter
+CACHE_PATH = None  # None -> cache is stored next to the result file
+RESULT_PATH = None  # None -> <ROOT_PATH>/<SAVE_PATH>/.results/
+RESULT_STATS = {"hit": 0, "miss": 0}
+_CACHE_FORMAT = 2  # bump when the layout of cache entries changes
+
+# used columns of the result files and their keys in the data dict
+COLUMNS = {
+    "bel": ([0, 2, 3, 4, 5], ["a", "e", "i", "o"]),
+    "bco": ([0, 2, 3, 4], ["x", "y", "z"]),
+}
+# binary output files share the column layout of their text counterparts
+COLUMNS["bhe"] = COLUMNS["bel"]
+COLUMNS["bbc"] = COLUMNS["bco"]
+# header labels of the text output files
+LABELS = {
+    "bel": ["time [dy]", "mass [Msol]", "a [au]", "e", "i [deg]",
+            "omega [deg]", "Omega [deg]", "M [deg]", "name"],
+    "bco": ["time [dy]", "mass [Msol]", "x [au]", "y [au]", "z [au]",
+            "vx [au/dy]", "vy [au/dy]", "vz [au/dy]", "name"],
+}
+BINARY = {"bhe", "bbc"}
+ALIASES = {"o": r"\omega", "h": r"\Theta"}
+# time prefix -> days
+T_DY = {"dy": 1, "yr": 365.2425, "kyr": 365242.5, "Myr": 365242500}
+# progress of nine.exe (show_progress), e.g. "  42.0 %"
+PROGRESS = re.compile(rb"(\d+(?:\.\d*)?)\s*%")
 
 
 def f_num(n:float) -> str:
@@ -54,154 +99,1141 @@ def theta(e:float, i:float) -> float:
     LKE constant relation.
     theta = (1 - e^2) cos^2i = const.
     i_0 ~ 39.2 degree
+    On arrays the SIMD cos of numpy is used, values can differ from the
+    element-wise (scalar) evaluation by 1 ULP (~1e-17).
     """
     return (1 - e ** 2) * (np.cos(np.deg2rad(i))) ** 2
 
 
+def _split_line(line:str) -> list:
+    r"""
+    Splits a header or data line of a result file into its fields.
+    Fields are separated by two or more whitespaces, unit declarations
+    [...] are dropped and remaining whitespace is replaced with '_'.
+    """
+    line = re.sub(r"\s\[(.*?)\]", r"", line.strip())
+    return [re.sub(r"\s", r"_", s) for s in re.split(r"\s{2,}", line)]
+
+
+def _read_head(f) -> (list, list):
+    r"""
+    Reads the label line and the first timestep block of an open (binary)
+    result file, the file position is reset to the first data line.
+    Returns labels and body names.
+    """
+    labels = _split_line(f.readline().decode())
+    pos = f.tell()
+    names = list()
+    line = f.readline()
+    while line.strip():
+        name = _split_line(line.decode())[-1]
+        if name in names:
+            break
+        names.append(name)
+        line = f.readline()
+    f.seek(pos)
+    return labels, names
+
+
+def _count_lines(f, chunk_size:int=1<<20) -> int:
+    r"""
+    Counts the remaining lines of an open (binary) file without parsing.
+    """
+    n_lines = 0
+    last = b"\n"
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        n_lines += chunk.count(b"\n")
+        last = chunk[-1:]
+    return n_lines + (last != b"\n")
+
+
+def _print_info(file_name:str, labels:list, names:list, n_lines:int) -> None:
+    print()
+    print("=" * (len(file_name) + 10))
+    print(" " * 5 + file_name)
+    print("=" * (len(file_name) + 10))
+    print()
+    print("Bodies:", len(names))
+    for i, name in enumerate(names):
+        print(f"{name}[{i}][:]", end=" ")
+    print("\n")
+    print("Datacolumns:", len(labels[:-1]))
+    for i, label in enumerate(labels[:-1]):
+        print(f"{label}[:][{i}]", end=" ")
+    print("\n")
+    print("Datalines:", n_lines)
+    print()
+
+
 def info_sim(file_name:str, output:bool=True) -> tuple:
     r"""
     Gives information about the result file from a simulation.
     Returns statistical information of the file: number of bodies,
         number of lines, body names
     """
-    # ultra complex regexp to parse output file
-    def get_line(f):
-        # replace whitespace and newline with ','
-        line = re.sub(r"(\s{2,}|\n)", r",", f.readline())
-        # replace unit declarations [...] with ''
-        line = re.sub(r"\s\[(.*?)\]", r"", line)
-        # replace remaining whitespace with '_'
-        line = re.sub(r"\s", r"_", line)
-        # return and strip commas from start and end
-        return re.split(r",", line[1:-1])
-    with open(file_name, "r") as f:
-        labels = get_line(f)
-        names = list()
-        name = get_line(f)[-1]
-        n_lines = 1
-        while name not in names:
-            names.append(name)
-            name = get_line(f)[-1]
-            n_lines += 1
-        n_bodies = len(names)
-        for remaining in f.readlines():
-            n_lines += 1
-        if output:
-            print()
-            print("=" * (len(file_name) + 10))
-            print(" " * 5 + file_name)
-            print("=" * (len(file_name) + 10))
-            print()
-            print("Bodies:", n_bodies)
-            for i, name in enumerate(names):
-                print(f"{name}[{i}][:]", end=" ")
-            print("\n")
-            print("Datacolumns:", len(labels[:-1]))
-            for i, label in enumerate(labels[:-1]):
-                print(f"{label}[:][{i}]", end=" ")
-            print("\n")
-            print("Datalines:", n_lines)
-            print()
-    return n_bodies, n_lines, names
-
-
-def load_sim(file_name:str, output:bool=True) -> dict:
+    with span("info", file=file_name, bytes=stat(file_name).st_size), \
+            open(file_name, "rb") as f:
+        labels, names = _read_head(f)
+        n_lines = _count_lines(f)
+    if output:
+        _print_info(file_name, labels, names, n_lines)
+    return len(names), n_lines, names
+
+
+def _cache_entry(file_name:str, cache_path:str=None,
+                 dtype=np.float64) -> (str, str):
     r"""
-    Load a simulation file, detects type based on file extension.
-    Currently `bel` and `bco` (partially) files are supported.
-    Time prefix for scaling: dy, yr, kyr, Myr
+    Path of the cache entry for a result file, keyed on path, size, mtime
+    and dtype, and a glob pattern matching all entries of that file.
+    """
+    if cache_path is None:
+        cache_path = CACHE_PATH
+    if cache_path is None:
+        cache_path = dirname(abspath(file_name))
+    st = stat(file_name)
+    path_key = sha1(abspath(file_name).encode()).hexdigest()[:12]
+    stat_key = f"{st.st_size}:{st.st_mtime_ns}:{_CACHE_FORMAT}"
+    stat_key = sha1(stat_key.encode()).hexdigest()
+    entry = join(cache_path, f"{basename(file_name)}.{path_key}")
+    dtype = np.dtype(dtype)
+    suffix = "" if dtype == np.float64 else f".{dtype.name}"
+    return entry + f"-{stat_key[:8]}{suffix}.npc", entry + "-*.npc"
+
+
+def _load_cache(file_name:str, entry:str) -> "Simulation":
+    r"""
+    Memory maps the columns of a cache entry.
+    """
+    with span("cache_load", file=file_name):
+        names = [str(name) for name in np.load(join(entry, "names.npy"))]
+        return Simulation(file_name, _sim_type(file_name), names,
+                          np.load(join(entry, "dy.npy"), mmap_mode="r"),
+                          np.load(join(entry, "raw.npy"), mmap_mode="r"))
+
+
+def _save_cache(D:"Simulation", entry:str, pattern:str,
+                dtype=None) -> None:
+    r"""
+    Writes the columns of D (as dtype, default their own) into a new cache
+    entry, the entry is moved into place atomically and stale entries of
+    the same file are removed (entries of other dtypes for the same state
+    of the file are kept).
+    """
+    cache_path = dirname(entry)
+    makedirs(cache_path, exist_ok=True)
+    tmp = mkdtemp(dir=cache_path, prefix=".npc-")
+    with span("cache_save", file=D.file_name, nbytes=D.nbytes):
+        np.save(join(tmp, "names.npy"), np.array(D.names))
+        np.save(join(tmp, "dy.npy"), D.dy)
+        # written through a mapping, views are converted without a copy
+        raw = np.lib.format.open_memmap(
+            join(tmp, "raw.npy"), mode="w+", shape=D.raw.shape,
+            dtype=D.raw.dtype if dtype is None else dtype)
+        raw[...] = D.raw
+        raw.flush()
+        del raw
+    current = entry[:len(pattern) - len("*.npc") + 8]
+    for stale in glob(pattern):
+        if not stale.startswith(current):
+            rmtree(stale, ignore_errors=True)
+    try:
+        rename(tmp, entry)
+    except OSError:
+        # another process was faster
+        rmtree(tmp, ignore_errors=True)
+
+
+def purge_cache(path:str=None) -> int:
+    r"""
+    Removes cache entries, path is either a result file (only its entries
+    are removed) or a cache directory (all entries are removed).
+    Defaults to CACHE_PATH, without CACHE_PATH the entries are next to the
+    result files and path is required.
+    Returns the number of removed entries.
     """
-    # couple of useful options have been commentend out for better performance
-    D = dict()
-    D["file_name"] = file_name
-    D["type"] = file_name.split(".")[-1]
-    D["n"], n_lines, D["names"] = info_sim(file_name, output=output)
-    D["steps"] = n_lines // D["n"]
-    D["dy"] = np.zeros(D["steps"], dtype=np.float64)
-    zero = np.zeros((D["n"], D["steps"]), dtype=np.float64)
-    if D["type"] == "bel":
-        cols = [0, 2, 3, 4, 5]
-        D["a"] = zero.copy()
-        D["e"] = zero.copy()
-        D["i"] = zero.copy()
-        D["o"] = D[r"\omega"] = zero.copy()
-        D["h"] = D[r"\Theta"] = zero.copy()
-    elif D["type"] == "bco":
-        cols = [0, 2, 3, 4]
-        D["x"] = zero.copy()
-        D["y"] = zero.copy()
-        D["z"] = zero.copy()
+    if path is None:
+        if CACHE_PATH is None:
+            raise Exception("No CACHE_PATH, give the result file or the "
+                            "directory of the cache entries.")
+        path = CACHE_PATH
+    if isfile(path):
+        entries = glob(_cache_entry(path)[1])
     else:
-        raise Exception(f"File extension '.{D['type']}' unknown/unsupported.")
-    data = np.genfromtxt(file_name, skip_header=1, usecols=cols,
-                         dtype=np.float64)
-    for j, t_idx in enumerate(range(0, n_lines, D["n"])):
-        D["dy"][j] = data[t_idx][0]
-        for n in range(D["n"]):
-            if D["type"] == "bel":
-                D["a"][n][j] = data[t_idx+n][1]
-                D["e"][n][j] = data[t_idx+n][2]
-                D["i"][n][j] = data[t_idx+n][3]
-                D["o"][n][j] = data[t_idx+n][4]
-                D["h"][n][j] = theta(D["e"][n][j], D["i"][n][j])
-            elif D["type"] == "bco":
-                D["x"][n][j] = data[t_idx+n][1]
-                D["y"][n][j] = data[t_idx+n][2]
-                D["z"][n][j] = data[t_idx+n][3]
+        entries = glob(join(path, "*.npc")) + glob(join(path, ".npc-*"))
+    for entry in entries:
+        rmtree(entry, ignore_errors=True)
+    return len(entries)
+
+
+def _binary_dtype(file_name:str, n_cols:int=8) -> np.dtype:
+    r"""
+    Detects the record layout of a binary result file.
+    Fortran sequential records are framed by 4 byte length markers, the
+    record length gives the number of double columns. Without markers
+    (stream access) n_cols doubles per record are assumed.
+    """
+    with open(file_name, "rb") as f:
+        head = np.frombuffer(f.read(4), dtype="<i4")
+        if head.size and head[0] > 0 and head[0] % 8 == 0:
+            f.seek(4 + int(head[0]))
+            tail = np.frombuffer(f.read(4), dtype="<i4")
+            if tail.size and tail[0] == head[0]:
+                return np.dtype([("head", "<i4"), ("d", "<f8", head[0] // 8),
+                                 ("tail", "<i4")])
+    return np.dtype([("d", "<f8", n_cols)])
+
+
+def _load_binary(file_name:str, conf:str=None) -> "Simulation":
+    r"""
+    Memory maps a binary result file (bbc or bhe) without copying.
+    Bodies are taken from the config that produced the file, by default the
+    .inn file with the same name.
+    """
+    sim_type = _sim_type(file_name)
+    if conf is None:
+        conf = file_name[:-len(sim_type)] + "inn"
+    if not isfile(conf):
+        raise FileNotFoundError(f"No config '{conf}' for '{file_name}'.")
+    names = [body[-1] for body in load_conf(conf).bodies]
+    # heliocentric elements don't include the central body
+    if sim_type == "bhe":
+        names = names[1:]
+    cols = COLUMNS[sim_type][0]
+    rec = np.memmap(file_name, dtype=_binary_dtype(file_name), mode="r")
+    if rec.shape[0] % len(names) != 0:
+        raise Exception(f"'{file_name}' doesn't match {len(names)} bodies "
+                        f"from '{conf}'.")
+    # (col, n, steps) view on the file, the used columns are consecutive
+    data = rec["d"].reshape(rec.shape[0] // len(names), len(names), -1)
+    data = data.transpose(2, 1, 0)
+    return Simulation(file_name, sim_type, names, data[cols[0]][0],
+                      data[cols[1]:cols[-1]+1])
+
+
+def _sim_type(file_name:str) -> str:
+    r"Type of a result file based on its extension."
+    sim_type = file_name.split(".")[-1]
+    if sim_type not in COLUMNS:
+        raise Exception(f"File extension '.{sim_type}' unknown/unsupported.")
+    return sim_type
+
+
+def _parse(file_name:str) -> (list, list, np.ndarray):
+    r"""
+    Parses a text result file in a single pass, header and first block
+    give the names, the numeric columns are parsed by the C reader of
+    numpy.
+    Returns labels, body names and the rows.
+    """
+    with span("parse", file=file_name, bytes=stat(file_name).st_size) as s, \
+            open(file_name, "rb") as f:
+        labels, names = _read_head(f)
+        data = np.loadtxt(f, usecols=COLUMNS[_sim_type(file_name)][0],
+                          dtype=np.float64, ndmin=2)
+        s.end(rows=data.shape[0])
+    return labels, names, data
+
+
+def _columns(data:np.ndarray, n:int) -> (np.ndarray, np.ndarray):
+    r"""
+    Views on parsed rows, interleaved as (step, body): the time dy (steps)
+    and the other columns (columns, n, steps), nothing is copied.
+    """
+    steps = data.shape[0] // n
+    data = data[:steps*n].reshape(steps, n, data.shape[1])
+    data = data.transpose(2, 1, 0)
+    return data[0][0], data[1:]
+
+
+def _split(data:np.ndarray, n:int,
+           dtype=np.float64) -> (np.ndarray, np.ndarray):
+    r"""
+    Demultiplexes parsed rows, interleaved as (step, body), into the time
+    dy (steps, always float64) and one contiguous array of the other
+    columns (columns, n, steps) of the given dtype.
+    """
+    with span("demux") as s:
+        dy, raw = _columns(data, n)
+        dy = np.ascontiguousarray(dy)
+        raw = np.ascontiguousarray(raw, dtype=dtype)
+        s.end(nbytes=raw.nbytes, shape=raw.shape)
+    return dy, raw
+
+
+def _demux(D:dict, data:np.ndarray) -> dict:
+    r"""
+    Demultiplexes parsed rows into the columns of D, D["n"] must be set.
+    """
+    D["dy"], raw = _split(data, D["n"])
+    D["steps"] = D["dy"].shape[0]
+    for k, key in enumerate(COLUMNS[D["type"]][1]):
+        D[key] = raw[k]
+    return D
+
+
+def _derive(D:dict) -> dict:
+    r"""
+    Adds derived quantities (Theta, time units) and aliases to D.
+    """
+    if "e" in D and "i" in D and "h" not in D:
+        with span("derived", key="h"):
+            D["h"] = theta(D["e"], D["i"])
+    for key, alias in ALIASES.items():
+        if key in D:
+            D[alias] = D[key]
     D["yr"] = D["dy"] / 365.2425
     D["kyr"] = D["yr"] / 1000
     # D["Myr"] = D["kyr"] / 1000
     return D
 
 
+def index_sim(file_name:str) -> dict:
+    r"""
+    Byte offsets of the timestep blocks of a text result file.
+    The index is stored next to the file (<file>.idx.npz) and rebuilt when
+    size or mtime of the file change.
+    Returns {"names": [...], "offsets": [...]}, offsets has steps + 1
+    entries, the last one is the end of the last complete block.
+    """
+    st = stat(file_name)
+    idx_file = file_name + ".idx.npz"
+    if isfile(idx_file):
+        with np.load(idx_file) as I:
+            if I["size"] == st.st_size and I["mtime"] == st.st_mtime_ns:
+                return {"names": [str(name) for name in I["names"]],
+                        "offsets": I["offsets"]}
+    with open(file_name, "rb") as f:
+        labels, names = _read_head(f)
+        n = len(names)
+        pos = f.tell()
+        offsets = [np.array([pos])]
+        line = 0
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            ends = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10)
+            # numbers of the lines starting after each newline
+            starts = line + 1 + np.arange(ends.shape[0])
+            offsets.append(ends[starts % n == 0] + pos + 1)
+            line += ends.shape[0]
+            pos += len(chunk)
+    offsets = np.concatenate(offsets)[:line//n+1]
+    try:
+        np.savez(idx_file + ".tmp.npz", offsets=offsets, size=st.st_size,
+                 mtime=st.st_mtime_ns, names=np.array(names))
+        replace(idx_file + ".tmp.npz", idx_file)
+    except OSError:
+        pass
+    return {"names": names, "offsets": offsets}
+
+
+def _body_index(names:list, bodies) -> list:
+    r"""
+    Indices of the selected bodies, given by index, name or the letter
+    at the end of the name (e.g. "cd" -> bodies c and d).
+    """
+    if type(bodies) is int:
+        bodies = [bodies]
+    elif type(bodies) is str:
+        bodies = [bodies] if bodies in names else list(bodies)
+    idx = list()
+    for body in bodies:
+        if type(body) is int:
+            idx.append(body)
+        elif body in names:
+            idx.append(names.index(body))
+        else:
+            match = [k for k, name in enumerate(names) if name.endswith(body)]
+            if len(match) != 1:
+                raise Exception(f"Body '{body}' not found in {names}.")
+            idx.append(match[0])
+    return idx
+
+
+def _window(D:"Simulation", bodies=None, t_range:tuple=None,
+            stride:int=1, T:str="kyr") -> "Simulation":
+    r"""
+    Selects bodies, time range (in units of T) and stride of a loaded
+    (mapped) simulation.
+    """
+    idx = list(range(D.n)) if bodies is None else \
+        _body_index(D.names, bodies)
+    s0, s1 = 0, D.steps
+    if t_range is not None:
+        t0, t1 = t_range
+        if t0 is not None:
+            s0 = np.searchsorted(D.dy, t0 * T_DY[T], side="left")
+        if t1 is not None:
+            s1 = np.searchsorted(D.dy, t1 * T_DY[T], side="right")
+    return Simulation(D.file_name, D.type, [D.names[k] for k in idx],
+                      D.dy[s0:s1:stride], D.raw[:, idx, s0:s1:stride])
+
+
+def _load_index(file_name:str, bodies=None, t_range:tuple=None,
+                stride:int=1, T:str="kyr",
+                dtype=np.float64) -> "Simulation":
+    r"""
+    Loads bodies, time range (in units of T) and stride of a text result
+    file, only the selected lines are read and parsed using index_sim.
+    """
+    I = index_sim(file_name)
+    names, off = I["names"], I["offsets"]
+    n, steps = len(names), len(off) - 1
+    idx = list(range(n)) if bodies is None else _body_index(names, bodies)
+    lines = list()
+    with open(file_name, "rb") as f:
+        # bisect over the block offsets, time is the first column
+        def time(j):
+            f.seek(off[j])
+            return float(f.readline().split()[0])
+        s0, s1 = 0, steps
+        if t_range is not None:
+            t0, t1 = t_range
+            if t0 is not None:
+                s0 = bisect_left(range(steps), t0 * T_DY[T], key=time)
+            if t1 is not None:
+                s1 = bisect_right(range(steps), t1 * T_DY[T], key=time)
+        if stride == 1 and s0 < s1:
+            f.seek(off[s0])
+            block = f.read(off[s1] - off[s0]).splitlines()
+            lines = [block[j+k] for j in range(0, len(block), n) for k in idx]
+        else:
+            for j in range(s0, s1, stride):
+                f.seek(off[j])
+                block = f.read(off[j+1] - off[j]).splitlines()
+                lines.extend(block[k] for k in idx)
+    sim_type = _sim_type(file_name)
+    cols = COLUMNS[sim_type][0]
+    if len(lines) == 0:
+        data = np.empty((0, len(cols)))
+    else:
+        with span("parse", file=file_name,
+                  bytes=sum(len(line) for line in lines)):
+            data = np.loadtxt(lines, usecols=cols, dtype=np.float64,
+                              ndmin=2)
+    return Simulation(file_name, sim_type, [names[k] for k in idx],
+                      *_split(data, len(idx), dtype))
+
+
+_KEYS = {alias: key for key, alias in ALIASES.items()}
+
+
+class Simulation(MutableMapping):
+    r"""
+    Loaded simulation (returned by load_sim).
+    The columns are stored in one (columns, n, steps) array raw and the
+    time in dy, derived quantities (Theta, yr, kyr, Myr) are computed on
+    first access and cached.
+    Items work like the data dict of load_sim: D["e"][j], D[r"\omega"],
+    D["kyr"], D["names"], D["n"], D["steps"], ...
+    """
+
+    __slots__ = ("file_name", "type", "names", "dy", "raw", "__cols",
+                 "__derived", "__extra")
+    _META = ("file_name", "type", "names", "n", "steps", "dy")
+
+    def __init__(self, file_name:str, sim_type:str, names:list,
+                 dy:np.ndarray, raw:np.ndarray):
+        self.file_name = file_name
+        self.type = sim_type
+        self.names = list(names)
+        self.dy = dy
+        self.raw = raw
+        self.__cols = {key: raw[k]
+                       for k, key in enumerate(COLUMNS[sim_type][1])}
+        self.__derived = dict()
+        self.__extra = dict()  # items set by the user
+
+    def __repr__(self) -> str:
+        return f"Simulation('{self.file_name}', n={self.n}, " \
+            f"steps={self.steps})"
+
+    @property
+    def n(self) -> int:
+        return self.raw.shape[1]
+
+    @property
+    def steps(self) -> int:
+        return self.dy.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        r"""
+        Memory of the columns, time and derived quantities computed so far.
+        """
+        return self.dy.nbytes + self.raw.nbytes + \
+            sum(X.nbytes for X in self.__derived.values())
+
+    def astype(self, dtype) -> "Simulation":
+        r"""
+        The simulation with columns of dtype, time stays float64.
+        Returns self if the columns are of dtype already.
+        """
+        if self.raw.dtype == dtype:
+            return self
+        return Simulation(self.file_name, self.type, self.names, self.dy,
+                          self.raw.astype(dtype))
+
+    @property
+    def __derivable(self) -> list:
+        if "e" in self.__cols and "i" in self.__cols:
+            return ["h", "yr", "kyr", "Myr"]
+        return ["yr", "kyr", "Myr"]
+
+    def __derive(self, key:str) -> np.ndarray:
+        if key == "h":
+            return theta(self["e"], self["i"])
+        elif key == "yr":
+            return self.dy / 365.2425
+        elif key == "kyr":
+            return self["yr"] / 1000
+        elif key == "Myr":
+            return self["kyr"] / 1000
+
+    def __getitem__(self, key:str):
+        key = _KEYS.get(key, key)
+        if key in self.__extra:
+            return self.__extra[key]
+        elif key in self._META:
+            return getattr(self, key)
+        elif key in self.__cols:
+            return self.__cols[key]
+        elif key in self.__derivable:
+            if key not in self.__derived:
+                with span("derived", key=key) as s:
+                    self.__derived[key] = self.__derive(key)
+                    s.end(nbytes=self.__derived[key].nbytes)
+            return self.__derived[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key:str, value) -> None:
+        self.__extra[_KEYS.get(key, key)] = value
+
+    def __delitem__(self, key:str) -> None:
+        del self.__extra[_KEYS.get(key, key)]
+
+    def __contains__(self, key:str) -> bool:
+        key = _KEYS.get(key, key)
+        return key in self.__extra or key in self._META or \
+            key in self.__cols or key in self.__derivable
+
+    def __iter__(self):
+        keys = [*self._META, *self.__cols, *self.__derivable, *self.__extra]
+        for key in dict.fromkeys(keys):
+            yield key
+            if key in ALIASES:
+                yield ALIASES[key]
+
+    def __len__(self) -> int:
+        return sum(1 for key in self)
+
+
+def _print_memory(D:"Simulation") -> None:
+    mib = D.nbytes / 2**20
+    line = f"memory: {mib:.1f} MiB"
+    if D.raw.dtype != np.float64:
+        saved = D.raw.size * 8 / 2**20 - D.raw.nbytes / 2**20
+        line += f" ({saved:.1f} MiB saved by {D.raw.dtype})"
+    print(line)
+
+
+def load_sim(file_name:str, output:bool=True, cache:bool=True,
+             cache_path:str=None, conf:str=None, bodies=None,
+             t_range:tuple=None, stride:int=1, T:str="kyr",
+             dtype=np.float64) -> "Simulation":
+    r"""
+    Load a simulation file, detects type based on file extension.
+    Currently `bel` and `bco` (partially) files are supported, as well as
+    their binary counterparts `bhe` and `bbc`, which are memory mapped
+    directly using the bodies of the config file conf (default: .inn file
+    with the same name).
+    Time prefix for scaling: dy, yr, kyr, Myr
+    The parsed columns are cached as binary (.npy) sidecar in cache_path
+    (default CACHE_PATH or next to the file) and memory mapped on reload,
+    the cache is invalidated when size or mtime of the file change.
+    A window can be loaded by selecting bodies (indices, names or letters),
+    t_range (start, stop) in units of T and stride, text files are then
+    read using the block index of index_sim (see there).
+    dtype sets the precision of the columns, e.g. np.float32 halves the
+    memory, the time dy is always kept as float64 (derived times too).
+    Returns a Simulation, which can be used like the former data dict,
+    derived quantities are only computed when used.
+    """
+    sim_type = _sim_type(file_name)
+    dtype = np.dtype(dtype)
+    windowed = bodies is not None or t_range is not None or stride != 1
+    # binary files are mapped directly, there is nothing to cache
+    cache = cache and sim_type not in BINARY
+    if cache:
+        entry, pattern = _cache_entry(file_name, cache_path, dtype)
+    if sim_type in BINARY:
+        if output:
+            print("mapping binary:", file_name)
+        D = _load_binary(file_name, conf)
+    elif cache and isdir(entry):
+        if output:
+            print("loading cache:", entry)
+        D = _load_cache(file_name, entry)
+    elif windowed:
+        if output:
+            print("loading window:", file_name)
+        D = _load_index(file_name, bodies, t_range, stride, T, dtype)
+        if output:
+            _print_memory(D)
+        return D
+    else:
+        labels, names, data = _parse(file_name)
+        if output:
+            _print_info(file_name, labels, names, data.shape[0])
+        D = Simulation(file_name, sim_type, names,
+                       *_split(data, len(names), dtype))
+        del data
+        if cache:
+            try:
+                _save_cache(D, entry, pattern)
+            except OSError as err:
+                if output:
+                    print("cache not written:", err)
+    if windowed:
+        D = _window(D, bodies, t_range, stride, T)
+    # binary files are mapped as float64, only the window is converted
+    D = D.astype(dtype)
+    if output:
+        _print_memory(D)
+    return D
+
+
+def iter_sim(file_name:str, chunk_steps:int=1024, conf:str=None) -> iter:
+    r"""
+    Iterates over a simulation file in blocks of chunk_steps timesteps,
+    memory is bounded by the block size and not by the file size.
+    Yields dicts with the keys of load_sim, holding only the block.
+    """
+    sim_type = _sim_type(file_name)
+    if sim_type in BINARY:
+        # mapped, only the pages of the current block are read
+        D = load_sim(file_name, output=False, conf=conf)
+        for j in range(0, D["steps"], chunk_steps):
+            B = {"file_name": file_name, "type": sim_type,
+                 "names": D["names"], "n": D["n"]}
+            B["dy"] = D["dy"][j:j+chunk_steps]
+            B["steps"] = B["dy"].shape[0]
+            for key in COLUMNS[sim_type][1]:
+                B[key] = D[key][:, j:j+chunk_steps]
+            yield _derive(B)
+        return
+    with open(file_name, "rb") as f:
+        labels, names = _read_head(f)
+        while True:
+            lines = list(islice(f, chunk_steps * len(names)))
+            if len(lines) == 0:
+                return
+            B = {"file_name": file_name, "type": sim_type,
+                 "names": names, "n": len(names)}
+            _demux(B, np.loadtxt(lines, usecols=COLUMNS[sim_type][0],
+                                 dtype=np.float64, ndmin=2))
+            # only complete timesteps
+            if B["steps"] == 0:
+                return
+            yield _derive(B)
+
+
+STATS = {"mean": np.mean, "median": np.median, "min": np.amin,
+         "max": np.amax, "std": np.std}
+
+
+def sim_summary(D:dict, window:float=0.01, T:str="kyr",
+                save:bool=True) -> dict:
+    r"""
+    Final state summary: mean, median, min, max and std (STATS) over the
+    trailing window (fraction of the timesteps) for all bodies and
+    quantities, computed with one axis-wise reduction per statistic.
+    D is a data dict or the file name of a result file. For file names
+    the summary is kept next to the file (<file>.sum.json) and reused as
+    long as size, mtime, window and T match, so e.g. NineConf.table of a
+    whole sweep doesn't need the raw data again.
+    Returns {"t": final time [T], "names": [...], <stat>: {key: [...]}}.
+    """
+    if type(D) is str:
+        file_name = D
+        st = stat(file_name)
+        tag = {"size": st.st_size, "mtime": st.st_mtime_ns,
+               "window": window, "T": T}
+        if isfile(file_name + ".sum.json"):
+            with open(file_name + ".sum.json", "r") as f:
+                S = json.load(f)
+            if S.get("tag") == tag:
+                return S
+        D = load_sim(file_name, output=False)
+    else:
+        save = False
+    keys = [*COLUMNS[D["type"]][1], *(["h"] if "h" in D else [])]
+    m = max(int(D["steps"] * window), 1)
+    X = np.stack([D[key][:, -m:] for key in keys])
+    S = {"t": float(D[T][-1]), "names": list(D["names"]), "steps": m}
+    for name, method in STATS.items():
+        R = method(X, axis=-1)
+        S[name] = {key: R[k].tolist() for k, key in enumerate(keys)}
+    if save:
+        S["tag"] = tag
+        try:
+            with open(file_name + ".sum.json.tmp", "w") as f:
+                json.dump(S, f)
+            replace(file_name + ".sum.json.tmp", file_name + ".sum.json")
+        except OSError:
+            pass
+    return S
+
+
 def sim_last(D:dict, T:str="kyr", method=np.mean) -> tuple:
     r"""
     Gives final mean values of simulation data dict.
+    The last 1% of the timesteps of all bodies are reduced by method along
+    the time axis at once. D can also be a file name, if method is one of
+    STATS the persisted summary (sim_summary) is used.
+    """
+    if type(D) is str:
+        name = {method: name for name, method in STATS.items()}.get(method)
+        if name is not None:
+            S = sim_summary(D, T=T)
+            return (int(S["t"]), *(S[name][key] for key in "aeio"))
+        D = load_sim(D, output=False)
+    m = max(int(D["steps"] / 100), 1)
+    X = method(np.stack([D[key][:, -m:] for key in "aeio"]), axis=-1)
+    return (int(D[T][-1]), *map(list, X))
+
+
+class SimTail:
+    r"""
+    Follows a text result file while nine.exe is still writing it.
+    update() parses only the timestep blocks appended since the last call
+    and appends them to growing arrays (capacity is doubled when full).
+    D is a data dict (like load_sim) with views on everything read so far.
+    """
+
+    def __init__(self, file_name:str, capacity:int=1024):
+        self.__file_name = file_name
+        self.__type = _sim_type(file_name)
+        if self.__type in BINARY:
+            raise Exception(f"Can't follow binary file '{file_name}'.")
+        self.__cols, keys = COLUMNS[self.__type]
+        self.__keys = keys + (["h"] if self.__type == "bel" else [])
+        self.__f = None
+        self.__buf = b""  # incomplete timestep blocks
+        self.__names = None
+        self.__steps = 0
+        self.__capacity = capacity
+        self.__time = None  # (dy, yr, kyr) x capacity
+        self.__data = None  # keys x n x capacity
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        if self.__f is not None:
+            self.__f.close()
+            self.__f = None
+
+    @property
+    def steps(self) -> int:
+        return self.__steps
+
+    @property
+    def names(self) -> list:
+        return self.__names
+
+    def __find_names(self, final:bool) -> bool:
+        r"""
+        Body names from the first block, which is complete when the first
+        name repeats (or the file is final).
+        """
+        lines = self.__buf.split(b"\n")[:-1]
+        if len(lines) < 2:
+            return False
+        names = list()
+        for line in lines[1:]:
+            name = _split_line(line.decode())[-1]
+            if name in names:
+                break
+            names.append(name)
+        else:
+            if not final:
+                return False
+        self.__names = names
+        self.__buf = self.__buf[len(lines[0])+1:]
+        return True
+
+    def __grow(self, steps:int) -> None:
+        n = len(self.__names)
+        if self.__data is None:
+            self.__time = np.zeros((3, self.__capacity))
+            self.__data = np.zeros((len(self.__keys), n, self.__capacity))
+        if steps <= self.__capacity:
+            return
+        self.__capacity = max(2 * self.__capacity, steps)
+        time = np.zeros((3, self.__capacity))
+        data = np.zeros((len(self.__keys), n, self.__capacity))
+        time[:, :self.__steps] = self.__time[:, :self.__steps]
+        data[:, :, :self.__steps] = self.__data[:, :, :self.__steps]
+        self.__time, self.__data = time, data
+
+    def update(self, final:bool=False) -> int:
+        r"""
+        Reads and parses newly appended complete timestep blocks.
+        final: the file is finished, the first block is complete even
+        without a second one.
+        Returns the number of new timesteps.
+        """
+        if self.__f is None:
+            if not isfile(self.__file_name):
+                return 0
+            self.__f = open(self.__file_name, "rb")
+        self.__buf += self.__f.read()
+        if self.__names is None and not self.__find_names(final):
+            return 0
+        n = len(self.__names)
+        ends = np.flatnonzero(np.frombuffer(self.__buf, dtype=np.uint8) == 10)
+        n_lines = ends.shape[0] // n * n
+        if n_lines == 0:
+            return 0
+        cut = ends[n_lines-1] + 1
+        B = {"type": self.__type, "n": n}
+        data = np.loadtxt(self.__buf[:cut].splitlines(), usecols=self.__cols,
+                          dtype=np.float64, ndmin=2)
+        _derive(_demux(B, data))
+        self.__buf = self.__buf[cut:]
+        j, new = self.__steps, B["steps"]
+        self.__grow(j + new)
+        for k, key in enumerate(["dy", "yr", "kyr"]):
+            self.__time[k, j:j+new] = B[key]
+        for k, key in enumerate(self.__keys):
+            self.__data[k, :, j:j+new] = B[key]
+        self.__steps += new
+        return new
+
+    @property
+    def D(self) -> dict:
+        r"""
+        Data dict of all timesteps read so far (views, no copies).
+        """
+        D = {"file_name": self.__file_name, "type": self.__type,
+             "names": self.__names, "n": len(self.__names or []),
+             "steps": self.__steps}
+        if self.__data is None:
+            return D
+        for k, key in enumerate(["dy", "yr", "kyr"]):
+            D[key] = self.__time[k, :self.__steps]
+        for k, key in enumerate(self.__keys):
+            D[key] = self.__data[k, :, :self.__steps]
+        for key, alias in ALIASES.items():
+            if key in D:
+                D[alias] = D[key]
+        return D
+
+
+def _violation(D:dict, new:int, bad:np.ndarray, what:str) -> str:
+    r"""
+    Reason for the first timestep with a bad body in the last new steps.
     """
-    t = int(D[T][-1])
-    a = []
-    e = []
-    i = []
-    o = []
-    m = int(D["steps"] / 100)
-    for n in range(D["n"]):
-        a.append(method(D["a"][n][-m:-1]))
-        e.append(method(D["e"][n][-m:-1]))
-        i.append(method(D["i"][n][-m:-1]))
-        o.append(method(D["o"][n][-m:-1]))
-    return (t, a, e, i, o)
-
-
-def save_file_path(name:str, file_extension:str, cnt:int=1,
+    steps = bad.any(axis=0)
+    if not steps.any():
+        return None
+    k = np.argmax(steps)
+    j = np.argmax(bad[:, k])
+    return f"{what}: {D['names'][j]} at {D['kyr'][-new+k]:.3f} kyr"
+
+
+def e_above(limit:float=0.99):
+    r"""
+    Stop criterion for NineConf.arun(watch=...): eccentricity above limit.
+    Criteria are called with the data dict of the bel output and the
+    number of new steps, they return the reason to stop or None.
+    """
+    def crit(D:dict, new:int) -> str:
+        return _violation(D, new, D["e"][:, -new:] > limit, f"e > {limit}")
+    return crit
+
+
+def a_outside(a_min:float, a_max:float):
+    r"""
+    Stop criterion: semi-major axis outside [a_min, a_max] (or NaN).
+    """
+    def crit(D:dict, new:int) -> str:
+        a = D["a"][:, -new:]
+        bad = ~((a >= a_min) & (a <= a_max))
+        return _violation(D, new, bad, f"a outside [{a_min}, {a_max}]")
+    return crit
+
+
+def theta_drift(max_drift:float):
+    r"""
+    Stop criterion: Theta differs more than max_drift from its start.
+    """
+    def crit(D:dict, new:int) -> str:
+        h = D["h"]
+        bad = np.abs(h[:, -new:] - h[:, :1]) > max_drift
+        return _violation(D, new, bad, f"Theta drift > {max_drift}")
+    return crit
+
+
+def _sim_shape(file_name:str) -> (int, int):
+    r"Number of bodies and timesteps in a result file without loading it."
+    if _sim_type(file_name) in BINARY:
+        D = load_sim(file_name, output=False)
+        return D["n"], D["steps"]
+    n, n_lines, names = info_sim(file_name, output=False)
+    return n, n_lines // n
+
+
+def stream_last(file_name:str, T:str="kyr", method=np.mean,
+                chunk_steps:int=1024) -> tuple:
+    r"""
+    Same as sim_last, but streams over the file and keeps only the
+    trailing window in memory.
+    """
+    steps = _sim_shape(file_name)[1]
+    start = steps - max(int(steps / 100), 1)
+    keys = [T, "a", "e", "i", "o"]
+    W = {key: [] for key in keys}
+    j = 0
+    for B in iter_sim(file_name, chunk_steps):
+        if j + B["steps"] > start:
+            for key in keys:
+                W[key].append(B[key][..., max(start-j, 0):])
+        j += B["steps"]
+    W = {key: np.concatenate(W[key], axis=-1) for key in keys}
+    X = method(np.stack([W[key] for key in keys[1:]]), axis=-1)
+    return (int(W[T][-1]), *map(list, X))
+
+
+def stream_range(file_name:str, keys:list=None,
+                 chunk_steps:int=1024) -> dict:
+    r"""
+    Streaming min/max per body (e.g. for plot limits).
+    Returns {key: (min, max)} with arrays of shape (n,).
+    """
+    R = dict()
+    for B in iter_sim(file_name, chunk_steps):
+        if keys is None:
+            keys = [*COLUMNS[B["type"]][1], *(["h"] if "h" in B else [])]
+        for key in keys:
+            lo, hi = np.amin(B[key], axis=-1), np.amax(B[key], axis=-1)
+            if key in R:
+                lo = np.minimum(R[key][0], lo)
+                hi = np.maximum(R[key][1], hi)
+            R[key] = (lo, hi)
+    return R
+
+
+def stream_drift(file_name:str, chunk_steps:int=1024) -> np.ndarray:
+    r"""
+    Streaming maximum drift |Theta(t) - Theta(0)| per body.
+    """
+    h_0 = drift = None
+    for B in iter_sim(file_name, chunk_steps):
+        if h_0 is None:
+            h_0 = B["h"][:, :1]
+            drift = np.zeros(B["n"])
+        drift = np.maximum(drift, np.amax(np.abs(B["h"] - h_0), axis=-1))
+    return drift
+
+
+def load_ensemble(file_names:list, quantities:list=None, workers:int=None,
+                  output:bool=True, cache:bool=True,
+                  dtype=np.float64) -> dict:
+    r"""
+    Loads several simulations of the same system (e.g. inclination
+    variants) into one (runs, bodies, steps) array per quantity (default:
+    all columns and Theta). Files are parsed concurrently by a thread pool
+    directly into the preallocated arrays, body counts and time grids of
+    all runs have to match. The quantities are stored as dtype (see
+    load_sim), the time as float64.
+    Returns a dict like load_sim with the additional keys file_names and
+    runs.
+    """
+    with ThreadPoolExecutor(workers or cpu_count()) as pool:
+        shapes = list(pool.map(_sim_shape, file_names))
+        if len(set(shapes)) != 1:
+            raise Exception("Body counts/steps differ: " + ", ".join(
+                f"{f} {s}" for f, s in zip(file_names, shapes)))
+        n, steps = shapes[0]
+        runs = len(file_names)
+        sim_type = _sim_type(file_names[0])
+        if quantities is None:
+            quantities = list(COLUMNS[sim_type][1])
+            if "e" in quantities:
+                quantities.append("h")
+        # aliases are added again by _derive
+        keys = {alias: key for key, alias in ALIASES.items()}
+        quantities = [keys.get(q, q) for q in quantities]
+        cols = COLUMNS[sim_type][1]
+        unknown = [q for q in quantities if q not in cols and q != "h"]
+        if unknown:
+            raise Exception(f"Unknown quantities {unknown}.")
+        E = {"file_names": file_names, "type": sim_type, "runs": runs,
+             "n": n, "steps": steps}
+        dy = np.empty((runs, steps))
+        for q in quantities:
+            E[q] = np.empty((runs, n, steps), dtype=dtype)
+
+        def job(k):
+            file_name = file_names[k]
+            if cache and sim_type not in BINARY:
+                entry, pattern = _cache_entry(file_name, dtype=dtype)
+            if sim_type in BINARY:
+                D = _load_binary(file_name)
+            elif cache and isdir(entry):
+                D = _load_cache(file_name, entry)
+            else:
+                # the parsed rows are demultiplexed by views straight into
+                # the slices of the run (no contiguous copy per run)
+                labels, names, data = _parse(file_name)
+                D = Simulation(file_name, sim_type, names,
+                               *_columns(data, len(names)))
+                if cache:
+                    try:
+                        _save_cache(D, entry, pattern, dtype)
+                    except OSError as err:
+                        if output:
+                            print("cache not written:", err)
+            dy[k] = D.dy
+            for q in quantities:
+                if q in cols:
+                    E[q][k] = D.raw[cols.index(q)]
+            if "h" in quantities:
+                e, i = (E[q][k] if q in quantities else
+                        np.ascontiguousarray(D.raw[cols.index(q)],
+                                             dtype=dtype)
+                        for q in ["e", "i"])
+                E["h"][k] = theta(e, i)
+            return D.names
+
+        for k, names in enumerate(pool.map(job, range(runs))):
+            if names != E.setdefault("names", names):
+                raise Exception(f"Bodies of '{file_names[k]}' differ: "
+                                f"{names} != {E['names']}.")
+            if output:
+                print(f"[{k+1}/{runs}] {file_names[k]}")
+    if not np.array_equal(dy, np.broadcast_to(dy[0], dy.shape)):
+        raise Exception("Time grids of the runs differ.")
+    E["dy"] = dy[0].copy()
+    del dy
+    if output:
+        size = sum(E[q].size for q in quantities)
+        line = f"memory: {size * E[quantities[0]].itemsize / 2**20:.1f} MiB"
+        if np.dtype(dtype) != np.float64:
+            saved = size * (8 - np.dtype(dtype).itemsize) / 2**20
+            line += f" ({saved:.1f} MiB saved by {np.dtype(dtype)})"
+        print(line)
+    return _derive(E)
+
+
+def _scan_cnt(save_path:str, name:str, file_extension:str) -> int:
+    r"""
+    Next counter after the existing <name>-<cnt>.<extension> files.
+    """
+    pattern = re.compile(re.escape(name) + r"-(\d+)\."
+                         + re.escape(file_extension))
+    cnt = 0
+    with scandir(save_path) as entries:
+        for entry in entries:
+            match = pattern.fullmatch(entry.name)
+            if match is not None:
+                cnt = max(cnt, int(match[1]))
+    return cnt + 1
+
+
+def save_file_path(name:str, file_extension:str, cnt:int=None,
                    ret_cnt:bool=False) -> str:
     r"""
     <ROOT_PATH>/<SAVE_PATH>/<name>-<cnt>.<extension>
-    Overwrite file counter with cnt.
+    Overwrite file counter with cnt (the first free counter from cnt on is
+    taken, so e.g. outputs get the counter of their inn file).
+    The path is reserved by creating it empty and exclusively (O_EXCL), so
+    parallel threads and processes never get the same path. Without cnt
+    the next counter per name is cached, the directory is scanned only
+    once.
     Counter is returned if ret_cnt == True -> (str, int)
     """
-    if not isdir(ROOT_PATH+SAVE_PATH):
-        call(["mkdir", ROOT_PATH+SAVE_PATH])
-    file_path = ROOT_PATH + SAVE_PATH + "/"
-    file_path += strftime(name, localtime())
-    file_path += "-%03d." + file_extension
-    while isfile(file_path % cnt):
-        cnt += 1
+    save_path = ROOT_PATH + SAVE_PATH
+    makedirs(save_path, exist_ok=True)
+    name = strftime(name, localtime())
+    file_path = save_path + "/" + name + "-%03d." + file_extension
+    key = (abspath(save_path), name, file_extension)
+    with _SAVE_LOCK:
+        if cnt is None:
+            if key not in _SAVE_CNT:
+                _SAVE_CNT[key] = _scan_cnt(save_path, name, file_extension)
+            cnt = _SAVE_CNT[key]
+        while True:
+            try:
+                close(os_open(file_path % cnt, O_CREAT | O_EXCL | O_WRONLY,
+                              0o666))
+                break
+            except FileExistsError:
+                # taken by another process or created by hand
+                cnt += 1
+        if cnt >= _SAVE_CNT.get(key, cnt + 1):
+            _SAVE_CNT[key] = cnt + 1
     file_path %= cnt
     if ret_cnt:
         return file_path, cnt
     return file_path
 
 
+def _release(file_path:str) -> None:
+    r"""
+    Frees a path reserved by save_file_path (when writing it failed), its
+    counter is taken again by the next call.
+    """
+    head, ext = file_path.rsplit(".", 1)
+    key = (abspath(dirname(file_path)), basename(head).rsplit("-", 1)[0],
+           ext)
+    with _SAVE_LOCK:
+        remove(file_path)
+        _SAVE_CNT.pop(key, None)
+
+
+def minmax_decimate(x:np.ndarray, y:np.ndarray,
+                    buckets:int) -> (np.ndarray, np.ndarray):
+    r"""
+    Min/max decimation for plotting: y is split into (about) buckets equal
+    buckets and only the minimum and maximum of each bucket are kept (in
+    their original order), so the drawn envelope and extrema stay intact.
+    """
+    size = y.shape[0]
+    buckets = int(buckets)
+    if buckets <= 0 or size <= 2 * buckets:
+        return x, y
+    width = -(-size // buckets)
+    buckets = -(-size // width)
+    # pad the last bucket with its last value (indices are clipped below)
+    Y = np.pad(y, (0, buckets * width - size), mode="edge")
+    Y = Y.reshape(buckets, width)
+    start = np.arange(buckets) * width
+    idx = np.stack([start + np.argmin(Y, axis=1),
+                    start + np.argmax(Y, axis=1)], axis=1)
+    idx = np.concatenate([[0], idx.ravel(), [size-1]]).clip(0, size-1)
+    idx = np.unique(idx)
+    return x[idx], y[idx]
+
+
 def plot(D:dict, plot_title:str=None, save_name:str=None,
-         cnt:int=1, T:str="kyr", L:str="e", R:str="i", L_lim:list=None,
+         cnt:int=None, T:str="kyr", L:str="e", R:str="i", L_lim:list=None,
          R_lim:tuple=None, L_ft:list=None, R_ft:list=None,
          L_col:str="red", R_col:str="blue", L_style:str="-",
          R_style:str="-", L_unit:str=None, R_unit:str=r"\degree",
          L_alpha:float=0.3, R_alpha:float=0.3, cut_at:list=None,
          legend_off:float=1.15, grid_opt:dict=None, hspace:float=0.4,
          dpi:int=300, output:bool=True, ignore_bodies:list=None,
-         **kwargs) -> None:
-    r"""Do some nice plotting bro!"""
+         decimate:bool=True, **kwargs) -> str:
+    r"""
+    Do some nice plotting bro!
+    With decimate the lines are reduced to the min/max per pixel of the
+    figure width (see minmax_decimate) before drawing.
+    Returns the path of the saved plot (None if only shown).
+    """
     save_path = None
     if output:
         print("loading sim")
@@ -240,6 +1272,8 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
         L_alpha = 0
     if R_alpha is None:
         R_alpha = 0
+    render = span("render", file=D.get("file_name"), n=D["n"],
+                  steps=D["steps"])
     # use TeX style for plotting
     plt.rc("text", usetex=True)
     plt.rc("font", family="serif")
@@ -252,7 +1286,19 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
     else:
         will_skipp = 0
     skipped = 0
+    # FFT filtering of all plotted bodies in one batch (cached spectra)
+    bodies = [j for j in range(D["n"])
+              if ignore_bodies is None or j not in ignore_bodies]
+    if L is not None and L_ft is not None:
+        L_F = ft_filter(D, L, L_ft[:len(bodies)], bodies)
+    if R is not None and R_ft is not None:
+        R_F = ft_filter(D, R, R_ft[:len(bodies)], bodies)
     fig, ax = plt.subplots(D["n"]-will_skipp, sharex=True)
+    # one bucket per pixel, None keeps all samples
+    px = fig.get_size_inches()[0] * dpi if decimate else None
+
+    def line(x, y):
+        return (x, y) if px is None else minmax_decimate(x, y, px)
     for j in range(D["n"]):
         if ignore_bodies is not None and j in ignore_bodies:
             skipped += 1
@@ -279,12 +1325,7 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
         else:
             if output:
                 print(f"\t{L} FFT = {L_ft[j_skp]}")
-            ft = np.fft.rfft(D[L][j])
-            if type(L_ft[j_skp]) is tuple and len(L_ft[j_skp]) == 2:
-                ft[L_ft[j_skp][0]:L_ft[j_skp][1]] = 0
-            else:
-                ft[L_ft[j_skp]:] = 0
-            L_D = np.fft.irfft(ft)
+            L_D = L_F[j_skp]
         if L_lim is None:
             L_min = np.amin(D[L][j])
             L_max = np.amax(D[L][j])
@@ -302,7 +1343,7 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
         L_x = D[T][:L_y.shape[0]]
         plt.setp(ax1, ylim=[L_min-L_off, L_max+L_off])
         ax1.set_ylabel(fr"${L}~[\si{{{L_unit}}}]$")
-        ax1.plot(L_x, L_y, linestyle=L_style, c=L_col,
+        ax1.plot(*line(L_x, L_y), linestyle=L_style, c=L_col,
                  label=fr"${L}$", **kwargs)
         if 0 < L_alpha < 1 and L_ft is not None:
             if cut_at[j] == 0:
@@ -310,7 +1351,7 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
             else:
                 L_y_b = D[L][j][:cut_steps]
             L_x_b = D[T][:L_y_b.shape[0]]
-            ax1.plot(L_x_b, L_y_b, c=L_col, alpha=L_alpha, **kwargs)
+            ax1.plot(*line(L_x_b, L_y_b), c=L_col, alpha=L_alpha, **kwargs)
         if j_skp == 0:
             ax1.legend(frameon=False, loc=10,
                        bbox_to_anchor=(0.1, legend_off))
@@ -322,12 +1363,7 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
             else:
                 if output:
                     print(f"\t{R} FFT = {R_ft[j_skp]}")
-                ft = np.fft.rfft(D[R][j])
-                if type(R_ft[j_skp]) is tuple and len(R_ft[j_skp]) == 2:
-                    ft[R_ft[j_skp][0]:R_ft[j_skp][1]] = 0
-                else:
-                    ft[R_ft[j_skp]:] = 0
-                R_D = np.fft.irfft(ft)
+                R_D = R_F[j_skp]
             if R_lim is None:
                 R_min = np.amin(D[R][j])
                 R_max = np.amax(D[R][j])
@@ -345,7 +1381,7 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
             R_x = D[T][:R_y.shape[0]]
             plt.setp(ax2, ylim=[R_min-R_off, R_max+R_off])
             ax2.set_ylabel(fr"${R}\, [\si{{{R_unit}}}]$")
-            ax2.plot(R_x, R_y, linestyle=R_style, c=R_col,
+            ax2.plot(*line(R_x, R_y), linestyle=R_style, c=R_col,
                      label=fr"${R}$", **kwargs)
             if 0 < R_alpha < 1 and R_ft is not None:
                 if cut_at[j] == 0:
@@ -353,7 +1389,7 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
                 else:
                     R_y_b = D[R][j][:cut_steps]
                 R_x_b = D[T][:R_y_b.shape[0]]
-                ax2.plot(R_x_b, R_y_b, c=R_col, alpha=R_alpha, **kwargs)
+                ax2.plot(*line(R_x_b, R_y_b), c=R_col, alpha=R_alpha, **kwargs)
             if j_skp == 0:
                 ax2.legend(frameon=False, loc=10,
                            bbox_to_anchor=(0.9, legend_off))
@@ -370,6 +1406,7 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
     ax1.set_xlabel(fr"$t\,[\si{{{T}}}]$")
     # --- finalize ---
     plt.subplots_adjust(hspace=hspace)
+    render.end()
     # if no save name is given, just show the plot
     if save_name is None:
         if output:
@@ -388,10 +1425,309 @@ def plot(D:dict, plot_title:str=None, save_name:str=None,
         save_path = save_file_path(save_name, extension, cnt)
         if output:
             print(save_path)
-        plt.savefig(save_path, dpi=dpi, bbox_inches="tight")
+        with span("savefig", file=save_path, dpi=dpi) as s:
+            try:
+                plt.savefig(save_path, dpi=dpi, bbox_inches="tight")
+            except BaseException:
+                _release(save_path)
+                raise
+            s.end(bytes=stat(save_path).st_size)
         if output:
             print("done!")
     plt.close()
+    return save_path
+
+
+def _plot_job(file_name:str, specs:list, cnt:int, root_path:str,
+              save_path:str) -> dict:
+    r"""
+    Loads one simulation and renders all plot specs from it (plot_many).
+    """
+    global ROOT_PATH, SAVE_PATH
+    ROOT_PATH, SAVE_PATH = root_path, save_path
+    plt.switch_backend("Agg")
+    S = {"file_name": file_name, "plots": list(), "render": list(),
+         "status": "done"}
+    stem = basename(file_name).rsplit(".", 1)[0]
+    t_0 = perf_counter()
+    D = load_sim(file_name, output=False)
+    S["load"] = perf_counter() - t_0
+    for spec in specs:
+        spec = {"cnt": cnt, **spec, "output": False}
+        spec["save_name"] = spec.get("save_name", "{stem}.pdf").format(
+            name=stem.split("-0")[0], stem=stem)
+        t_0 = perf_counter()
+        S["plots"].append(plot(D, **spec))
+        S["render"].append(perf_counter() - t_0)
+    S["seconds"] = S["load"] + sum(S["render"])
+    return S
+
+
+def plot_many(file_names:list, specs:list, workers:int=None,
+              output:bool=True) -> list:
+    r"""
+    Renders plots of many simulations in parallel processes, every file is
+    loaded once and plotted with all specs (dicts of plot arguments).
+    In save_name {name} is replaced by the file name without counter and
+    {stem} by the file name without extension, e.g.
+    specs=[dict(save_name="{name}-e_i.pdf", L="e", R="i"), ...]
+    Files sharing a {name} start their plot counters at their position
+    among those files (so parallel jobs don't pick the same name).
+    A failing file doesn't stop the others.
+    Returns per file: file_name, status ("done" or "error (...)"), plots
+    (paths), load, render (per spec) and seconds.
+    """
+    names = [basename(f).rsplit(".", 1)[0].split("-0")[0] for f in file_names]
+    cnts = [names[:k+1].count(name) for k, name in enumerate(names)]
+    makedirs(ROOT_PATH + SAVE_PATH, exist_ok=True)
+    with ProcessPoolExecutor(workers or cpu_count()) as pool:
+        futures = [pool.submit(_plot_job, file_name, specs, cnt, ROOT_PATH,
+                               SAVE_PATH)
+                   for file_name, cnt in zip(file_names, cnts)]
+        results = {future: file_name
+                   for future, file_name in zip(futures, file_names)}
+        for k, future in enumerate(as_completed(futures)):
+            try:
+                results[future] = future.result()
+            except Exception as err:
+                results[future] = {"file_name": results[future],
+                                   "status": f"error ({err})", "plots": [],
+                                   "render": [], "load": 0.0,
+                                   "seconds": 0.0}
+            S = results[future]
+            if output and S["status"] != "done":
+                print(f"[{k+1}/{len(futures)}] {S['file_name']}: "
+                      f"{S['status']}")
+            elif output:
+                print(f"[{k+1}/{len(futures)}] {S['file_name']}: "
+                      f"load {S['load']:.2f} s, render "
+                      + ", ".join(f"{t:.2f}" for t in S["render"])
+                      + f" s -> {', '.join(S['plots'])}")
+    return [results[future] for future in futures]
+
+
+_EXE_IDS = dict()
+
+
+def _exe_id(exe_path:str) -> str:
+    r"""
+    Hash of the executable, memoized on path, size and mtime.
+    """
+    st = stat(exe_path)
+    key = (abspath(exe_path), st.st_size, st.st_mtime_ns)
+    if key not in _EXE_IDS:
+        with open(exe_path, "rb") as f:
+            _EXE_IDS[key] = sha256(f.read()).hexdigest()
+    return _EXE_IDS[key]
+
+
+def result_key(text:str, exe_path:str) -> str:
+    r"""
+    Content address of a simulation: hash of the config text and of the
+    executable that integrates it.
+    """
+    return sha256((_exe_id(exe_path) + "\n" + text).encode()).hexdigest()
+
+
+def _result_path() -> str:
+    if RESULT_PATH is None:
+        return ROOT_PATH + SAVE_PATH + "/.results/"
+    return RESULT_PATH
+
+
+def _load_result(key:str) -> dict:
+    r"""
+    Result record of key, None if unknown or if its files are gone.
+    """
+    record = join(_result_path(), key + ".json")
+    if not isfile(record):
+        return None
+    with open(record, "r") as f:
+        R = json.load(f)
+    if not all(isfile(file_name) for file_name in [R["inn"], *R["files"]]):
+        return None
+    return R
+
+
+def _save_result(key:str, inn_file:str, out_file:str, files:list) -> None:
+    result_path = _result_path()
+    makedirs(result_path, exist_ok=True)
+    record = join(result_path, key + ".json")
+    with open(record + ".tmp", "w") as f:
+        json.dump({"inn": inn_file, "out": out_file, "files": files}, f)
+    replace(record + ".tmp", record)
+
+
+def _last_lines(file_name:str) -> (list, list):
+    r"""
+    Body names and the lines of the last timestep block of a text result
+    file, only the end of the file is read.
+    """
+    with open(file_name, "rb") as f:
+        names = _read_head(f)[1]
+        start = f.tell()
+        size = f.seek(0, 2)
+        chunk = 1 << 16
+        while True:
+            f.seek(max(start, size - chunk))
+            lines = f.read().splitlines()
+            if len(lines) > len(names) or size - chunk <= start:
+                break
+            chunk *= 2
+    if len(names) == 0 or len(lines) < len(names):
+        raise Exception(f"No complete timestep in '{file_name}'.")
+    return names, [_split_line(line.decode())
+                   for line in lines[-len(names):]]
+
+
+def last_state(file_name:str) -> (float, list):
+    r"""
+    Time [dy] and bodies of the last timestep of a bco file in the rv input
+    format: [rx, ry, rz, vx, vy, vz, mass, None, name].
+    Columns are assumed as time, mass, x, y, z, vx, vy, vz, name (units
+    as written by nine.exe, au and au/dy).
+    """
+    names, lines = _last_lines(file_name)
+    if len(lines[-1]) < 9:
+        raise Exception(f"'{file_name}' has no velocities.")
+    bodies = [[*map(float, cols[2:8]), float(cols[1]), None, cols[-1]]
+              for cols in lines]
+    return float(lines[-1][0]), bodies
+
+
+def _stitch(files:list, out_file:str) -> str:
+    r"""
+    Concatenates the result files of consecutive segments, timesteps
+    repeated at the start of a segment are skipped.
+    """
+    last_t = -np.inf
+    with open(out_file, "wb") as out:
+        for k, file_name in enumerate(files):
+            if _sim_type(file_name) in BINARY:
+                rec = np.memmap(file_name, dtype=_binary_dtype(file_name),
+                                mode="r")
+                skip = np.searchsorted(rec["d"][:, 0], last_t, side="right")
+                out.write(memoryview(rec[skip:]))
+                if rec.shape[0] > 0:
+                    last_t = rec["d"][-1, 0]
+                continue
+            with open(file_name, "rb") as f:
+                head = f.readline()
+                if k == 0:
+                    out.write(head)
+                while True:
+                    pos = f.tell()
+                    line = f.readline()
+                    if not line.strip() or float(line.split()[0]) > last_t:
+                        break
+                f.seek(pos)
+                copyfileobj(f, out)
+            last_t = float(_last_lines(file_name)[1][-1][0])
+    return out_file
+
+
+def run_many(confs:list, workers:int=None, overwrite_timing:list=None,
+             exe_path:str=ROOT_PATH+"/nine.exe", output:bool=True,
+             callback=None) -> list:
+    r"""
+    Runs several NineConf simulations in parallel (workers default to the
+    number of cores). Every job gets its own scratch directory inside
+    <ROOT_PATH>/<SAVE_PATH>, so results are moved into place atomically.
+    Returns a status dict per conf: index (in confs), name, inn, out,
+    status (done, cached, no output, failed (returncode) or error (...)),
+    seconds.
+    callback is called with the status dict as soon as a job is finished.
+    """
+    save_path = ROOT_PATH + SAVE_PATH
+    makedirs(save_path, exist_ok=True)
+
+    def job(k, c):
+        S = {"index": k, "name": c.name, "inn": None, "out": None}
+        work_dir = mkdtemp(dir=save_path, prefix=".run-")
+        t_0 = perf_counter()
+        try:
+            S["inn"], S["out"] = c.run(overwrite_timing, exe_path=exe_path,
+                                       work_dir=work_dir)
+            if c.cached:
+                S["status"] = "cached"
+            elif c.returncode == 0 and \
+                    len(c.out_files) < len(c.outputfiles.split(" ")):
+                S["status"] = "no output"
+            elif S["out"] is not None and c.returncode == 0:
+                S["status"] = "done"
+            else:
+                S["status"] = f"failed ({c.returncode})"
+        except Exception as err:
+            S["status"] = f"error ({err})"
+        finally:
+            rmtree(work_dir, ignore_errors=True)
+        S["seconds"] = perf_counter() - t_0
+        return S
+
+    with ThreadPoolExecutor(workers or cpu_count()) as pool:
+        futures = [pool.submit(job, k, c) for k, c in enumerate(confs)]
+        for k, future in enumerate(as_completed(futures)):
+            S = future.result()
+            if output:
+                print(f"[{k+1}/{len(futures)}] {S['name']}: {S['status']} "
+                      f"({S['seconds']:.1f} s) -> {S['out']}")
+            if callback is not None:
+                callback(S)
+    return [future.result() for future in futures]
+
+
+async def _emit(on_event, event:dict) -> None:
+    if on_event is not None:
+        ret = on_event(event)
+        if asyncio.iscoroutine(ret):
+            await ret
+
+
+async def arun_many(confs:list, workers:int=None, overwrite_timing:list=None,
+                    exe_path:str=ROOT_PATH+"/nine.exe", timeout:float=None,
+                    output:bool=True, callback=None, on_event=None,
+                    watch:list=None, poll:float=1.0) -> list:
+    r"""
+    Runs several NineConf simulations concurrently in one event loop (see
+    NineConf.arun), at most workers (default: number of cores) at once.
+        S = asyncio.run(arun_many(confs, timeout=3600))
+    Returns a status dict per conf like run_many, status is done, cached,
+    stopped (reason, see watch), failed (returncode), timeout or
+    error (...).
+    on_event gets the events of all runs with their index.
+    """
+    limit = asyncio.Semaphore(workers or cpu_count())
+    done = [0]
+
+    async def job(k, c):
+        S = {"index": k, "name": c.name, "inn": None, "out": None}
+        async with limit:
+            t_0 = perf_counter()
+            try:
+                S["inn"], S["out"] = await c.arun(
+                    overwrite_timing, exe_path=exe_path, timeout=timeout,
+                    on_event=lambda e: _emit(on_event, {"index": k, **e}),
+                    watch=watch, poll=poll)
+                if c.stopped is not None:
+                    S["status"] = f"stopped ({c.stopped})"
+                else:
+                    S["status"] = "cached" if c.cached else "done"
+            except asyncio.TimeoutError:
+                S["status"] = "timeout"
+            except CalledProcessError as err:
+                S["status"] = f"failed ({err.returncode})"
+            except Exception as err:
+                S["status"] = f"error ({err})"
+            S["seconds"] = perf_counter() - t_0
+        done[0] += 1
+        if output:
+            print(f"[{done[0]}/{len(confs)}] {S['name']}: {S['status']} "
+                  f"({S['seconds']:.1f} s) -> {S['out']}")
+        if callback is not None:
+            callback(S)
+        return S
+
+    return await asyncio.gather(*[job(k, c) for k, c in enumerate(confs)])
 
 
 class NineConf:
@@ -433,6 +1769,11 @@ class NineConf:
         self.__inn_file = None
         self.__inn_cnt = None  # save counter from last inn file
         self.__out_file = None
+        self.__out_files = list()
+        self.__returncode = None  # of the executable in the last run
+        self.__cached = False  # last run was a result cache hit
+        self.__progress = None  # of the executable in arun
+        self.__stopped = None  # reason of an early stop in arun
 
     def __str__(self) -> str:
         return self.__C
@@ -448,52 +1789,451 @@ class NineConf:
     def name(self) -> str:
         return self.__name
 
+    @property
+    def bodies(self) -> list:
+        return self.__bodies
+
+    @property
+    def timing(self) -> list:
+        return self.__timing
+
+    @property
+    def outputfiles(self) -> str:
+        return self.__outputfiles
+
+    @property
+    def inputformat(self) -> str:
+        return self.__inputformat
+
     def save(self) -> int:
         r"""
         Save .inn file.
         """
+        return self.__save(self.__C)
+
+    def __save(self, text:str) -> int:
+        # the file is reserved by save_file_path
         self.__inn_file, self.__inn_cnt = \
             save_file_path(self.__name, "inn", ret_cnt=True)
-        with open(self.__inn_file, "w") as f:
-            f.write(self.__C)
+        try:
+            with open(self.__inn_file, "w") as f:
+                f.write(text)
+        except BaseException:
+            _release(self.__inn_file)
+            raise
         return self.__inn_file, self.__inn_cnt
 
+    def __from_cache(self, key:str) -> bool:
+        r"""
+        Takes the result of key (see result_key) from the result cache,
+        hits and misses are counted in RESULT_STATS.
+        Returns whether it was found.
+        """
+        R = _load_result(key)
+        RESULT_STATS["hit" if R is not None else "miss"] += 1
+        if R is None:
+            return False
+        print(f"result cache hit {key[:12]}: {R['out']}")
+        self.__inn_file, self.__out_file = R["inn"], R["out"]
+        self.__out_files = R["files"]
+        self.__returncode = 0
+        self.__cached = True
+        return True
+
     def run(self, overwrite_timing:list=None, inn_file:str=None,
-            exe_path:str=ROOT_PATH+"/nine.exe") -> (str, str):
+            exe_path:str=ROOT_PATH+"/nine.exe",
+            work_dir:str=None, cache:bool=True,
+            segments:int=None) -> (str, str):
         r"""
         Run the simulation (saves beforehand).
         Overwrite timing lets you change the timing (nona)
         -> [start, stop, step]
+        With work_dir the executable runs inside that directory instead of
+        ROOT_PATH, which allows several simulations at the same time.
+        With cache a config that was already integrated by the same
+        executable is not run again, the paths of the old result are
+        returned (see result_key).
+        With segments the timing is split into that many consecutive runs,
+        see run_segments (which picks its own inn files and work dirs).
         """
+        if segments is not None and segments > 1:
+            if inn_file is not None or work_dir is not None:
+                raise Exception("inn_file and work_dir can't be used with "
+                                "segments.")
+            return self.run_segments(segments, overwrite_timing,
+                                     exe_path=exe_path, cache=cache)
         self.__overwrite_timing = overwrite_timing
+        self.__out_files = list()
+        self.__out_file = None
+        self.__returncode = None
+        self.__cached = False
+        if inn_file is None:
+            text = self.__C
+        else:
+            with open(inn_file, "r") as f:
+                text = f.read()
+        # without executable there is nothing to identify the result with
+        cache = cache and isfile(exe_path)
+        if cache:
+            key = result_key(text, exe_path)
+            if self.__from_cache(key):
+                return self.__inn_file, self.__out_file
         if inn_file is None:
-            self.save()
+            self.__save(text)
         else:
             self.__inn_file = inn_file
-        call(["cp", self.__inn_file, ROOT_PATH+"/config.inn"])
+        run_path = ROOT_PATH if work_dir is None else work_dir
+        out_files = list()
+        call(["cp", self.__inn_file, run_path+"/config.inn"])
         try:
-            call(exe_path)
+            with span("exe", name=self.__name, exe=exe_path) as s:
+                if work_dir is None:
+                    self.__returncode = call(exe_path)
+                else:
+                    self.__returncode = call(abspath(exe_path), cwd=work_dir)
+                s.end(returncode=self.__returncode)
             for file_extension in self.__file_extensions:
-                old_files = glob(ROOT_PATH+"/*."+file_extension)
+                old_files = glob(run_path+"/*."+file_extension)
                 # raise error if there are other files with that extension
                 # (avoid overwriting old simulations)
                 if len(old_files) > 1:
                     raise FileExistsError
+                if len(old_files) == 0:
+                    print(f"No .{file_extension} output of {self.__name}.")
+                    continue
                 old_file = old_files[0]
                 new_file = save_file_path(self.__name, file_extension,
                                           cnt=self.__inn_cnt)
                 call(["mv", old_file, new_file])
                 self.__out_file = new_file
+                out_files.append(new_file)
         except FileExistsError:
             print("Old sim files found.")
         finally:
-            call(["rm", ROOT_PATH+"/config.inn"])
-            return self.__inn_file, self.__out_file
+            self.__out_files = out_files
+            call(["rm", run_path+"/config.inn"])
+            if cache and self.__returncode == 0 and \
+                    len(out_files) == len(self.__file_extensions):
+                _save_result(key, self.__inn_file, self.__out_file, out_files)
+        return self.__inn_file, self.__out_file
+
+    def run_segments(self, segments:int, overwrite_timing:list=None,
+                     exe_path:str=ROOT_PATH+"/nine.exe", cache:bool=True,
+                     keep:bool=False) -> (str, str):
+        r"""
+        Runs the timing in segments (aligned on the output step), every
+        segment restarts from the last barycentric state of the previous
+        one (bco output fed back with inputformat rv), so an interrupted
+        run only loses the current segment.
+        Progress is kept in a state file (<result path>/<key>.segments.json,
+        key from result_key of the full config and segments), running the
+        same config again resumes after the last finished segment.
+        The segment outputs are stitched into one result per output file
+        (and removed unless keep), which is also stored in the result cache
+        (with cache).
+        Returns the paths of the inn and the (last) stitched output file.
+        """
+        if not isfile(exe_path):
+            raise FileNotFoundError(f"No executable '{exe_path}'.")
+        self.__overwrite_timing = overwrite_timing
+        text = self.__C
+        t_0, t_1, dt = overwrite_timing or self.__timing
+        steps = round((t_1 - t_0) / dt)
+        bounds = [t_0 + dt * round(steps * j / segments)
+                  for j in range(segments)] + [t_1]
+        if cache:
+            key = result_key(text, exe_path)
+            if self.__from_cache(key):
+                return self.__inn_file, self.__out_file
+        self.__cached = False
+        state_file = join(_result_path(), result_key(
+            text + f"\nsegments {segments}", exe_path) + ".segments.json")
+        S = {"segments": segments, "bounds": bounds, "done": list()}
+        if isfile(state_file):
+            with open(state_file, "r") as f:
+                S = json.load(f)
+            # segments whose files are gone have to be run again
+            for j, seg in enumerate(S["done"]):
+                if not all(isfile(p) for p in [seg["inn"], *seg["files"]]):
+                    S["done"] = S["done"][:j]
+                    break
+            if len(S["done"]) > 0:
+                print(f"resuming {self.__name} after segment "
+                      f"{len(S['done'])}/{segments}")
+        if "inn" not in S or not isfile(S["inn"]):
+            S["inn"], S["cnt"] = self.__save(text)
+
+        def save_state():
+            makedirs(dirname(state_file), exist_ok=True)
+            with open(state_file + ".tmp", "w") as f:
+                json.dump(S, f)
+            replace(state_file + ".tmp", state_file)
+
+        extensions = self.__file_extensions
+        seg_extensions = extensions + ([] if "bco" in extensions
+                                       else ["bco"])
+        save_path = ROOT_PATH + SAVE_PATH
+        makedirs(save_path, exist_ok=True)
+        for j in range(len(S["done"]), segments):
+            seg = copy(self)
+            seg.__name = f"{self.__name}.seg{j+1:03d}"
+            seg.__outputfiles = " ".join(seg_extensions)
+            seg.__timing = [bounds[j], bounds[j+1], dt]
+            if j > 0:
+                bco = S["done"][-1]["files"][seg_extensions.index("bco")]
+                seg.__timing[0], seg.__bodies = last_state(bco)
+                seg.__inputformat = "rv"
+            print(f"segment {j+1}/{segments}: "
+                  f"{seg.__timing[0]:g} - {seg.__timing[1]:g} dy")
+            work_dir = mkdtemp(dir=save_path, prefix=".run-")
+            try:
+                inn, out = seg.run(exe_path=exe_path, work_dir=work_dir,
+                                   cache=cache)
+            finally:
+                rmtree(work_dir, ignore_errors=True)
+            if seg.returncode != 0 or \
+                    len(seg.out_files) != len(seg_extensions):
+                self.__returncode = seg.returncode
+                raise Exception(f"Segment {j+1}/{segments} of "
+                                f"{self.__name} failed ({seg.returncode}).")
+            S["done"].append({"inn": inn, "files": seg.out_files})
+            save_state()
+        out_files = list()
+        for k, file_extension in enumerate(extensions):
+            out_file = save_file_path(self.__name, file_extension,
+                                      cnt=S["cnt"])
+            _stitch([seg["files"][k] for seg in S["done"]], out_file)
+            out_files.append(out_file)
+        if cache:
+            _save_result(key, S["inn"], out_files[-1], out_files)
+        if not keep:
+            for seg in S["done"]:
+                for file_name in [seg["inn"], *seg["files"]]:
+                    remove(file_name)
+            remove(state_file)
+        self.__inn_file, self.__out_file = S["inn"], out_files[-1]
+        self.__out_files = out_files
+        self.__returncode = 0
+        return self.__inn_file, self.__out_file
+
+    async def arun(self, overwrite_timing:list=None, inn_file:str=None,
+                   exe_path:str=ROOT_PATH+"/nine.exe", work_dir:str=None,
+                   cache:bool=True, timeout:float=None,
+                   on_event=None, watch:list=None,
+                   poll:float=1.0) -> (str, str):
+        r"""
+        Run the simulation without blocking (saves beforehand), see run.
+        The executable runs in work_dir (default: a scratch directory in
+        <ROOT_PATH>/<SAVE_PATH>), its output is parsed into events passed
+        to on_event (function or coroutine):
+            {"name", "type": "start", "pid"}
+            {"name", "type": "progress", "percent"}
+            {"name", "type": "output", "line"}
+            {"name", "type": "exit", "returncode"}
+            {"name", "type": "timeout"/"cancelled"}
+        After timeout [s] or on cancellation the process is killed and
+        asyncio.TimeoutError or CancelledError raised, a failing executable
+        raises CalledProcessError and missing output files
+        FileNotFoundError.
+        watch is a list of stop criteria (e.g. [e_above(0.99),
+        a_outside(0.1, 50), theta_drift(0.05)]), every poll [s] the bel
+        output (required) is parsed incrementally (SimTail) and checked,
+        the first criterion that fires kills the executable (a failing
+        criterion too, its error is raised). The reason is kept in
+        stopped and sent as {"name", "type": "stopped", "reason"}, the
+        partial output files are moved as usual (not cached).
+        Returns the paths of the inn and the (last) output file.
+        """
+        self.__overwrite_timing = overwrite_timing
+        self.__out_file = None
+        self.__out_files = list()
+        self.__returncode = None
+        self.__cached = False
+        self.__progress = None
+        self.__stopped = None
+        # the criteria need the elements
+        if watch and "bel" not in self.__file_extensions:
+            raise Exception("Watching needs the bel output file.")
+        if inn_file is None:
+            text = self.__C
+        else:
+            with open(inn_file, "r") as f:
+                text = f.read()
+        cache = cache and isfile(exe_path)
+        if cache:
+            key = result_key(text, exe_path)
+            if self.__from_cache(key):
+                return self.__inn_file, self.__out_file
+        if inn_file is None:
+            self.__save(text)
+        else:
+            self.__inn_file = inn_file
+        scratch = work_dir is None
+        if scratch:
+            save_path = ROOT_PATH + SAVE_PATH
+            makedirs(save_path, exist_ok=True)
+            work_dir = mkdtemp(dir=save_path, prefix=".run-")
+        event = {"name": self.__name}
+        try:
+            copyfile(self.__inn_file, join(work_dir, "config.inn"))
+            with span("exe", name=self.__name, exe=exe_path) as s:
+                proc = await asyncio.create_subprocess_exec(
+                    abspath(exe_path), cwd=work_dir,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT)
+                await _emit(on_event, {**event, "type": "start",
+                                       "pid": proc.pid})
+                if watch:
+                    watcher = asyncio.create_task(self.__watch(
+                        proc, join(work_dir, "*.bel"), watch, poll, event,
+                        on_event))
+                try:
+                    self.__returncode = await asyncio.wait_for(
+                        self.__stream(proc, event, on_event), timeout)
+                except (asyncio.TimeoutError, asyncio.CancelledError) as err:
+                    if proc.returncode is None:
+                        proc.kill()
+                    self.__returncode = await proc.wait()
+                    kind = "timeout" if type(err) is asyncio.TimeoutError \
+                        else "cancelled"
+                    s.end(returncode=self.__returncode, reason=kind)
+                    await _emit(on_event, {**event, "type": kind})
+                    raise
+                finally:
+                    if watch:
+                        watcher.cancel()
+                        await asyncio.gather(watcher, return_exceptions=True)
+                # a failing criterion killed the executable
+                if watch and not watcher.cancelled() and \
+                        watcher.exception() is not None:
+                    s.end(returncode=self.__returncode, reason="watch")
+                    raise watcher.exception()
+                s.end(returncode=self.__returncode, reason=self.__stopped)
+            await _emit(on_event, {**event, "type": "exit",
+                                   "returncode": self.__returncode})
+            if self.__returncode != 0 and self.__stopped is None:
+                raise CalledProcessError(self.__returncode, exe_path)
+            cache = cache and self.__stopped is None
+            old_files = list()
+            for file_extension in self.__file_extensions:
+                found = glob(join(work_dir, "*." + file_extension))
+                if len(found) != 1:
+                    raise FileNotFoundError(f"{len(found)} .{file_extension} "
+                                            f"files in '{work_dir}'.")
+                old_files.append(found[0])
+            out_files = list()
+            for old_file, file_extension in zip(old_files,
+                                                self.__file_extensions):
+                new_file = save_file_path(self.__name, file_extension,
+                                          cnt=self.__inn_cnt)
+                move(old_file, new_file)
+                out_files.append(new_file)
+            self.__out_file = out_files[-1]
+            self.__out_files = out_files
+            if cache:
+                _save_result(key, self.__inn_file, self.__out_file, out_files)
+        finally:
+            if scratch:
+                rmtree(work_dir, ignore_errors=True)
+            elif isfile(join(work_dir, "config.inn")):
+                remove(join(work_dir, "config.inn"))
+        return self.__inn_file, self.__out_file
+
+    async def __watch(self, proc, pattern:str, criteria:list, poll:float,
+                      event:dict, on_event) -> None:
+        r"""
+        Checks the stop criteria on the output growing in pattern until one
+        fires or proc exits, the parsing runs in a thread. If a criterion
+        fails proc is killed and the error raised.
+        """
+        tail = None
+        try:
+            while proc.returncode is None:
+                await asyncio.sleep(poll)
+                if tail is None:
+                    found = glob(pattern)
+                    if len(found) == 0:
+                        continue
+                    tail = SimTail(found[0])
+                new = await asyncio.to_thread(tail.update)
+                if new == 0:
+                    continue
+                D = tail.D
+                for crit in criteria:
+                    reason = crit(D, new)
+                    if reason is not None:
+                        self.__stopped = reason
+                        if proc.returncode is None:
+                            proc.kill()
+                        await _emit(on_event, {**event, "type": "stopped",
+                                               "reason": reason})
+                        return
+        except Exception:
+            if proc.returncode is None:
+                proc.kill()
+            raise
+        finally:
+            if tail is not None:
+                tail.close()
+
+    async def __stream(self, proc, event:dict, on_event) -> int:
+        r"""
+        Reads the output of proc until it exits, lines end with \n or \r
+        (progress bars).
+        """
+        buf = b""
+        while True:
+            chunk = await proc.stdout.read(1 << 12)
+            *lines, buf = re.split(rb"[\r\n]", buf + chunk)
+            if not chunk:
+                lines.append(buf)
+            for line in lines:
+                match = PROGRESS.search(line)
+                if match is not None:
+                    self.__progress = float(match[1])
+                    await _emit(on_event, {**event, "type": "progress",
+                                           "percent": self.__progress})
+                elif line.strip():
+                    line = line.decode(errors="replace")
+                    await _emit(on_event, {**event, "type": "output",
+                                           "line": line})
+            if not chunk:
+                return await proc.wait()
+
+    @property
+    def stopped(self) -> str:
+        r"""
+        Reason why arun stopped the executable early (watch), else None.
+        """
+        return self.__stopped
+
+    @property
+    def progress(self) -> float:
+        r"""
+        Last progress [%] reported by the executable in arun.
+        """
+        return self.__progress
+
+    @property
+    def out_files(self) -> list:
+        r"""
+        All output files of the last run (order of outputfiles).
+        """
+        return self.__out_files
+
+    @property
+    def returncode(self) -> int:
+        return self.__returncode
+
+    @property
+    def cached(self) -> bool:
+        return self.__cached
 
     def table(self, D:dict=None, save_name:str=None, T:str="kyr") -> str:
         r"""
         The D is for comparison with the final values, if None only the
-        initial values are shown.
+        initial values are shown. D can also be the file name of the result,
+        then only its persisted summary is loaded (see sim_summary).
         When save_name is provided, the table will be saved in that file, else
         the table will be returned as str.
         T... time prefix yr, kyr, Myr
@@ -501,8 +2241,7 @@ class NineConf:
         sep = "&"
         eol = r"\\" + "\n"
         indent = 4 * " "
-        if type(D) is str:
-            D = load_sim(D)
+        # for file names the persisted summary is used (see sim_summary)
         if D is not None:
             t, a, e, i, o = sim_last(D)
             h = [theta(ee, i[j]) for j, ee in enumerate(e)]
@@ -551,8 +2290,12 @@ class NineConf:
         tex += r"\end{tabular}"
         if save_name is not None:
             save_path = save_file_path(save_name.replace(".tex", ""), "tex")
-            with open(save_path, "w") as f:
-                return f.write(tex)
+            try:
+                with open(save_path, "w") as f:
+                    return f.write(tex)
+            except BaseException:
+                _release(save_path)
+                raise
         return tex
 
     @property
@@ -632,3 +2375,41 @@ Integrators:
 6.....Gauss Radau with adaptive stepsize, GR (spheric heliocentric metric) and Yarkovsky Thermal effect
 7.....Gauss Radau with adaptive stepsize, GR (EIH barycentric metric) 
 8.....Gauss Radau with adaptive stepsize, GR (EIH barycentric metric) and Yarkovsky Thermal effect"""
+
+
+def load_conf(file_name:str, name:str=None) -> NineConf:
+    r"""
+    Load a .inn file as NineConf (inverse of NineConf.save).
+    The name defaults to the file name without counter and extension.
+    """
+    with open(file_name, "r") as f:
+        lines = f.read().split("\n")
+    # parameter lines: <value(s)>   ...<description>
+    P = [line.split("...")[0].split() for line in lines[:17]]
+    bodies = list()
+    for line in lines[17:17+int(P[3][0])]:
+        body = line.split()
+        bodies.append([*map(p_num, body[:7]), None, body[7]])
+    if name is None:
+        name = basename(file_name).rsplit(".", 1)[0]
+        name = re.sub(r"-\d{3,}$", r"", name)
+    return NineConf(
+        bodies=bodies,
+        name=name,
+        timing=list(map(p_num, P[1])),
+        integrator_id=int(P[0][0]),
+        candy_lie_stepsize=p_num(P[2][0]),
+        error_mark=p_num(P[4][0]),
+        integrator_coordiantes=P[5][0],
+        inputformat=P[6][0],
+        lie_sw=int(P[7][0]),
+        lie_st=list(map(int, P[8])),
+        min_stepsize=p_num(P[9][0]),
+        cutoff_radius=[p_num(P[10][0]), *map(p_bool, P[10][1:])],
+        ce_file=[p_bool(P[11][0]), *map(p_num, P[11][1:])],
+        merging=[P[12][0] == "yes", *map(p_num, P[12][1:])],
+        limit_mass=p_num(P[13][0]),
+        show_progress=p_bool(P[14][0]),
+        outputfiles=" ".join(P[15]),
+        planetoid_rings=P[16][0] == "yes",
+    )
@@ -13,36 +13,33 @@ N.SAVE_PATH = "../plot/"
 cuty = []
 igi = ""
 
+specs = [
+    dict(save_name="{name}-e_i.pdf",
+         L="e", L_unit=None, L_col="red",
+         R="i", R_unit=r"\degree", R_col="dodgerblue",
+         # L_alpha=0, R_alpha=0,
+         L_ft=None,
+         R_ft=None,
+         ignore_bodies=igi,
+         cut_at=cuty,
+         # legend_off=1.075,
+         rasterized=True),
+    dict(save_name="{name}-omega_theta.pdf",
+         L=r"\omega", L_unit=r"\degree", L_col="limegreen",
+         R=r"\Theta", R_unit=None, R_col="purple",
+         R_alpha=0.3,
+         L_ft=None,
+         R_ft=10,
+         ignore_bodies=igi,
+         cut_at=cuty,
+         # legend_off=1.075,
+         rasterized=True),
+]
+
 # j = 0
-# p = sorted(glob("./out/*.bel"))[j]
-# if True:
-
-for p in sorted(glob("../sim/*.bel")):
-
-    name = p.split("/")[-1].split(".")[0].split("-0")[0]
-    D = N.load_sim(p)
-    if 1:
-        N.plot(D, save_name=name+"-e_i.pdf",
-               L="e", L_unit=None, L_col="red",
-               R="i", R_unit=r"\degree", R_col="dodgerblue",
-               # L_alpha=0, R_alpha=0,
-               L_ft=None,
-               R_ft=None,
-               ignore_bodies=igi,
-               cut_at=cuty,
-               # legend_off=1.075,
-               rasterized=True)
-    if 1:
-        N.plot(D, save_name=name+"-omega_theta.pdf",
-               L=r"\omega", L_unit=r"\degree", L_col="limegreen",
-               R=r"\Theta", R_unit=None, R_col="purple",
-               R_alpha=0.3,
-               L_ft=None,
-               R_ft=10,
-               ignore_bodies=igi,
-               cut_at=cuty,
-               # legend_off=1.075,
-               rasterized=True)
+# paths = sorted(glob("./out/*.bel"))[j:j+1]
+
+N.plot_many(sorted(glob("../sim/*.bel")), specs)
 
 
 # C = [
@@ -76,8 +73,7 @@ for p in sorted(glob("../sim/*.bel")):
 # ]
 
 
-# for c in C:
-#     c.run()
+# N.run_many(C)
 
 # for c, p in zip(C, sorted(glob("../sim/*.bel"))):
 #     D = N.load_sim(p)
@@ -0,0 +1,147 @@
+import zlib
+import weakref
+import numpy as np
+
+from collections import OrderedDict
+
+from metrics import span
+
+
+CACHE_SIZE = 32  # number of cached spectra (array, quantity)
+_SPECTRA = OrderedDict()
+
+
+def _fingerprint(X:np.ndarray) -> tuple:
+    r"""
+    Cheap fingerprint of the data of X (crc32 of its bytes), a single pass
+    over the data compared to the rfft.
+    """
+    return (X.shape, X.dtype.str,
+            zlib.crc32(memoryview(np.ascontiguousarray(X)).cast("B")))
+
+
+def spectrum(D:dict, key:str) -> np.ndarray:
+    r"""
+    rfft of all bodies of a quantity in one batch along the time axis.
+    Spectra are cached per array of the quantity (as long as it is alive
+    and its data unchanged), the least recently used one is dropped when
+    more than CACHE_SIZE are cached.
+    Returns a read only array of shape (n, steps // 2 + 1).
+    """
+    X = D[key]
+    k = (id(X), key)
+    try:
+        ref, fp = weakref.ref(X), _fingerprint(X)
+    except TypeError:
+        # not an array (list, ...), not cached
+        ref = fp = None
+    if ref is not None and k in _SPECTRA:
+        old_ref, old_fp, ft = _SPECTRA[k]
+        if old_ref() is X and old_fp == fp:
+            _SPECTRA.move_to_end(k)
+            return ft
+        del _SPECTRA[k]
+    with span("fft", key=key, shape=np.shape(X)) as s:
+        ft = np.fft.rfft(X, axis=-1)
+        s.end(nbytes=ft.nbytes)
+    ft.flags.writeable = False
+    if ref is not None:
+        _SPECTRA[k] = (ref, fp, ft)
+        while len(_SPECTRA) > CACHE_SIZE:
+            _SPECTRA.popitem(last=False)
+    return ft
+
+
+def clear_cache() -> None:
+    _SPECTRA.clear()
+
+
+def ft_filter(D:dict, key:str, ft:list, bodies:list=None) -> np.ndarray:
+    r"""
+    Spectral filtering of a quantity with the (cached) spectrum.
+    ft gives the cut per body (same order as bodies, default all bodies):
+        int k         -> low-pass, frequencies >= k are removed
+        tuple (k, l)  -> band-stop, frequencies k..l-1 are removed
+        None          -> unfiltered
+    Returns the filtered series, shape (len(bodies), steps).
+    """
+    if bodies is None:
+        bodies = range(D[key].shape[0])
+    F = spectrum(D, key)[list(bodies)]
+    for j, cut in enumerate(ft):
+        if type(cut) is tuple and len(cut) == 2:
+            F[j, cut[0]:cut[1]] = 0
+        elif cut is not None:
+            F[j, cut:] = 0
+    with span("ifft", key=key, shape=F.shape):
+        return np.fft.irfft(F, n=D[key].shape[-1], axis=-1)
+
+
+ANGLES = {"o", r"\omega"}  # wrapping angles in degrees, unwrapped first
+
+
+def stack(sims:list, key:str) -> np.ndarray:
+    r"""
+    Stacks a quantity of several simulations into (runs, bodies, steps),
+    sims is a list of data dicts or an ensemble (nine.load_ensemble).
+    """
+    if type(sims) is dict:
+        return sims[key]
+    shapes = {D[key].shape for D in sims}
+    if len(shapes) != 1:
+        raise Exception(f"Can't stack '{key}' of shapes {shapes}.")
+    return np.stack([D[key] for D in sims])
+
+
+def periodogram(X:np.ndarray, dt:float,
+                segments:int=1) -> (np.ndarray, np.ndarray):
+    r"""
+    Hann windowed periodogram along the last axis of X (any leading
+    shape). With segments > 1 the power of 50% overlapping segments is
+    averaged (Welch). Every segment is detrended linearly, so circulating
+    angles don't leak into low frequencies.
+    Returns frequencies [1/dt] and power (..., frequencies).
+    """
+    size = X.shape[-1] * 2 // (segments + 1)
+    W = np.lib.stride_tricks.sliding_window_view(X, size, axis=-1)
+    W = W[..., ::max(size // 2, 1), :][..., :segments, :]
+    t = np.arange(size) - (size - 1) / 2
+    W = W - W.mean(axis=-1, keepdims=True)
+    W = W - t * ((W * t).sum(axis=-1, keepdims=True) / (t * t).sum())
+    power = np.abs(np.fft.rfft(W * np.hanning(size), axis=-1)) ** 2
+    return np.fft.rfftfreq(size, dt), power.mean(axis=-2)
+
+
+def secular_periods(sims:list, keys:list=None, T:str="kyr",
+                    segments:int=1) -> np.ndarray:
+    r"""
+    Dominant period of every quantity (default: e, i, omega, Theta) per
+    body and run, all runs are analysed in one vectorized pass.
+    sims is a list of data dicts or an ensemble (nine.load_ensemble).
+    Returns a table (structured array) with the fields run (index in
+    sims), body, key, period [T] and power (fraction of the total power
+    in the peak).
+    """
+    first = sims if type(sims) is dict else sims[0]
+    if keys is None:
+        keys = [key for key in ["e", "i", r"\omega", r"\Theta"]
+                if key in first]
+    t = first[T]
+    dt = (t[-1] - t[0]) / (t.shape[0] - 1)
+    names = first["names"]
+    rows = list()
+    for key in keys:
+        X = stack(sims, key)
+        if key in ANGLES:
+            X = np.unwrap(X, period=360, axis=-1)
+        f, P = periodogram(X, dt, segments)
+        # DC is removed by detrending
+        peak = np.argmax(P[..., 1:], axis=-1) + 1
+        power = np.take_along_axis(P, peak[..., None], axis=-1)[..., 0]
+        power /= P[..., 1:].sum(axis=-1)
+        for run, body in np.ndindex(peak.shape):
+            rows.append((run, names[body], key, 1 / f[peak[run, body]],
+                         power[run, body]))
+    return np.array(rows, dtype=[("run", int), ("body", "U32"),
+                                 ("key", "U16"), ("period", float),
+                                 ("power", float)])
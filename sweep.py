@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import json
+import numpy as np
+
+from itertools import product
+from os.path import isfile, abspath
+
+import nine as N
+
+
+def grid(**params) -> list:
+    r"""
+    All combinations of the given parameter values.
+    grid(i_b=[-10, -20], i_c=[10, 20]) -> [{"i_b": -10, "i_c": 10}, ...]
+    """
+    keys = list(params)
+    return [dict(zip(keys, vals)) for vals in product(*params.values())]
+
+
+def sample(n:int, seed:int=None, **ranges) -> list:
+    r"""
+    n uniform random samples from the given (min, max) parameter ranges.
+    sample(100, i_d=(0, 90), o_d=(0, 360)) -> [{"i_d": 12.3, ...}, ...]
+    """
+    rng = np.random.default_rng(seed)
+    vals = {key: rng.uniform(*lim, size=n) for key, lim in ranges.items()}
+    return [{key: float(vals[key][k]) for key in vals} for k in range(n)]
+
+
+def _key(params:dict, timing:list=None, exe:str=None) -> str:
+    r"""
+    A point is identified by its parameters, the overwritten timing and
+    the executable (absolute path).
+    """
+    return json.dumps({"params": params, "timing": timing, "exe": exe},
+                      sort_keys=True)
+
+
+def read_manifest(manifest:str) -> dict:
+    r"""
+    Last record of every point in a sweep manifest (JSON lines).
+    """
+    M = dict()
+    if isfile(manifest):
+        with open(manifest, "r") as f:
+            for line in f:
+                # a crash can leave the last line incomplete
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                M[_key(rec["params"], rec.get("timing"),
+                       rec.get("exe"))] = rec
+    return M
+
+
+def sweep(factory, points:list, manifest:str=None, workers:int=None,
+          overwrite_timing:list=None, exe_path:str=N.ROOT_PATH+"/nine.exe",
+          output:bool=True) -> list:
+    r"""
+    Runs factory(**params) for every point (see grid and sample) in
+    parallel with nine.run_many.
+    Every finished point is appended to the manifest (default:
+    <ROOT_PATH>/<SAVE_PATH>/<factory>-sweep.jsonl) with parameters, inn and
+    output paths, timing, executable, runtime and status. Rerunning the same
+    sweep resumes it, points already done with the same timing and
+    executable are skipped.
+    Returns the manifest records of all points.
+    """
+    if manifest is None:
+        manifest = N.ROOT_PATH + N.SAVE_PATH
+        manifest += f"/{factory.__name__}-sweep.jsonl"
+    timing = None if overwrite_timing is None else list(overwrite_timing)
+    exe = abspath(exe_path)
+
+    def key(params):
+        return _key(params, timing, exe)
+    M = read_manifest(manifest)
+    todo = [p for p in points
+            if M.get(key(p), {}).get("status") not in {"done", "cached"}]
+    if output:
+        print(f"sweep {factory.__name__}: {len(points)} points, "
+              f"{len(points) - len(todo)} done, {len(todo)} to run")
+    confs = [factory(**p) for p in todo]
+
+    def write(S):
+        rec = {"factory": factory.__name__, "params": todo[S["index"]],
+               "timing": timing, "exe": exe,
+               **{k: S[k] for k in ["inn", "out", "status", "seconds"]}}
+        with open(manifest, "a") as f:
+            f.write(json.dumps(rec) + "\n")
+        M[key(rec["params"])] = rec
+
+    N.run_many(confs, workers=workers, overwrite_timing=overwrite_timing,
+               exe_path=exe_path, output=output, callback=write)
+    return [M.get(key(p)) for p in points]